@@ -1,13 +1,14 @@
 import asyncio
 import contextlib
 import datetime
-import io
 import json
 import logging
 import os
 import re
+import sys
+import time
 import traceback
-from collections import defaultdict, deque, namedtuple
+from collections import defaultdict, deque
 
 import typing
 
@@ -40,7 +41,19 @@ import asyncgur
 
 from DuckBot import errors
 from DuckBot.helpers import slash_utils, constants
+from DuckBot.helpers.afk import AfkStore
+from DuckBot.helpers.command_index import CommandSuggestionIndex
+from DuckBot.helpers.command_usage import CommandUsageRecorder
+from DuckBot.helpers.counting import CountHistory, CountingActors
+from DuckBot.helpers.discriminators import DiscriminatorIndex
+from DuckBot.helpers.emoji_index import EmojiIndex
+from DuckBot.helpers.error_reporter import ErrorReporter
+from DuckBot.helpers.log_outbox import LogOutbox
+from DuckBot.helpers.log_queue import PendingLog
+from DuckBot.helpers.log_routing import GuildLogRoutes
+from DuckBot.helpers.message_store import MessageStore
 from DuckBot.helpers.helper import LoggingEventsFlags
+from DuckBot.helpers.message_router import MessageRouter
 from DuckBot.helpers.context import CustomContext
 
 initial_extensions = (
@@ -55,13 +68,33 @@ with open(f'{os.getenv("COGS_PATH")}/music-config.json', "r+") as file:
 log = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO, format='[%(asctime)-15s] %(message)s')
 
+CACHE_SNAPSHOT_PATH = os.getenv('CACHE_SNAPSHOT_PATH') or 'cache-snapshot.json'
+CACHE_SNAPSHOT_VERSION = 5
+LOG_OUTBOX_PATH = os.getenv('LOG_OUTBOX_PATH')
+MESSAGE_CACHE_SIZE = int(os.getenv('MESSAGE_CACHE_SIZE') or 250)
+MESSAGE_STORE_SIZE = int(os.getenv('MESSAGE_STORE_SIZE') or 25000)
+MESSAGE_STORE_COMPRESS_OVER = int(os.getenv('MESSAGE_STORE_COMPRESS_OVER')) if os.getenv('MESSAGE_STORE_COMPRESS_OVER') else None
+
 os.environ['JISHAKU_NO_UNDERSCORE'] = 'True'
 os.environ['JISHAKU_HIDE'] = 'True'
 target_type = Union[discord.Member, discord.User, discord.PartialEmoji, discord.Guild, discord.Invite, str]
 
 
+def merge_cache(live: dict, fresh: dict, before: dict) -> None:
+    """ Brings `live` in line with `fresh` from the database, keeping the keys written to it since `before` was copied. """
+    for key in set(live) | set(fresh):
+        if live.get(key, discord.utils.MISSING) is not before.get(key, discord.utils.MISSING):
+            continue
+        if key in fresh:
+            live[key] = fresh[key]
+        else:
+            del live[key]
+
+
 class DuckBot(slash_utils.Bot):
     PRE: tuple = ('db.',)
+    NO_PREFIX_COMMANDS: tuple = ('jishaku', 'eval', 'jsk', 'ev', 'rall', 'dev', 'rmsg')
+    command_index: CommandSuggestionIndex = None
 
     def user_blacklisted(self, ctx: CustomContext):
         if not self.blacklist.get(ctx.author.id, None) or ctx.author.id == self.owner_id:
@@ -86,6 +119,7 @@ class DuckBot(slash_utils.Bot):
             activity=discord.Streaming(name="db.help", url="https://www.youtube.com/watch?v=dQw4w9WgXcQ"),
             enable_debug_events=True,
             strip_after_prefix=True,
+            max_messages=MESSAGE_CACHE_SIZE,
         )
         self.allowed_mentions = discord.AllowedMentions.none()
 
@@ -95,8 +129,6 @@ class DuckBot(slash_utils.Bot):
                                        username=os.getenv('ASYNC_PRAW_UN'),
                                        password=os.getenv('ASYNC_PRAW_PA'))
 
-        log_wh = self.log_webhooks = namedtuple('log_wh', ['default', 'message', 'member', 'join_leave', 'voice', 'server'])
-
         self.add_check(self.user_blacklisted)
         self.add_check(self.maintenance_mode)
 
@@ -126,25 +158,37 @@ class DuckBot(slash_utils.Bot):
         self.lavalink = None
         self.invites = None
         self.prefixes = {}
+        self.prefix_matchers: typing.Dict[typing.Optional[int], tuple] = {}
+        self._prefix_fetches: typing.Dict[int, asyncio.Task] = {}
         self.blacklist = {}
-        self.afk_users = {}
-        self.auto_un_afk = {}
+        self.afk = AfkStore(self)
         self.welcome_channels = {}
         self.suggestion_channels = {}
         self.dm_webhooks = defaultdict(str)
         self.counting_channels = {}
-        self.counting_rewards = {}
+        self.counting_rewards: typing.Dict[int, typing.Dict[int, dict]] = {}
+        self.counting = CountingActors(self)
         self.saved_messages = {}
-        self.common_discrims = []
-        self.log_channels: typing.Dict[int, log_wh] = {}
-        self.log_cache = defaultdict(lambda: defaultdict(list))
+        self.discriminator_index = DiscriminatorIndex()
+        self.emoji_index = EmojiIndex()
+        self.error_reporter = ErrorReporter(self, 880181130408636456)
+        self.log_channels: typing.Dict[int, GuildLogRoutes] = {}
+        self.log_cache = defaultdict(lambda: defaultdict(deque))
+        self.log_outbox = LogOutbox(LOG_OUTBOX_PATH) if LOG_OUTBOX_PATH else None
+        self.message_store = MessageStore(MESSAGE_STORE_SIZE, compress_over=MESSAGE_STORE_COMPRESS_OVER)
         self.guild_loggings: typing.Dict[int, LoggingEventsFlags] = {}
+        # Set once populate_cache has loaded everything from the database, log webhook URLs included.
+        self.cache_ready = asyncio.Event()
         self.imgur = asyncgur.Imgur(client_id=os.getenv('IMGUR_CL_ID'))
         self.global_mapping = commands.CooldownMapping.from_cooldown(10, 12, commands.BucketType.user)
+        self.message_router = MessageRouter(self)
+        self.command_usage = CommandUsageRecorder(self)
+        self.command_index = CommandSuggestionIndex(self)
 
         for ext in initial_extensions:
             self._load_extension(ext)
 
+        self.load_cache_snapshot()
         self.loop.create_task(self.populate_cache())
         self.loop.create_task(self.dynamic_load_cogs())
         self.db: asyncpg.Pool = self.loop.run_until_complete(self.create_db_pool())
@@ -156,6 +200,21 @@ class DuckBot(slash_utils.Bot):
             traceback.print_exc()
             print()  # Empty line
 
+    @property
+    def common_discrims(self) -> typing.List[str]:
+        return self.discriminator_index.discriminators
+
+    def add_command(self, command: commands.Command) -> None:
+        super().add_command(command)
+        if self.command_index:
+            self.command_index.invalidate()
+
+    def remove_command(self, name: str) -> Optional[commands.Command]:
+        command = super().remove_command(name)
+        if self.command_index:
+            self.command_index.invalidate()
+        return command
+
     async def dynamic_load_cogs(self) -> None:
         with contextlib.suppress(asyncio.TimeoutError):
             await self.wait_for('pool_create', timeout=3)
@@ -167,28 +226,49 @@ class DuckBot(slash_utils.Bot):
         logging.info('Loading cogs done.')
         self.dispatch('restart_complete')
 
-    async def get_pre(self, bot, message: discord.Message, raw_prefix: Optional[bool] = False) -> List[str]:
-        if not message:
-            return commands.when_mentioned_or(*self.PRE)(bot, message) if not raw_prefix else self.PRE
-        if not message.guild:
-            return commands.when_mentioned_or(*self.PRE)(bot, message) if not raw_prefix else self.PRE
+    def get_prefix_matcher(self, guild_id: Optional[int]) -> tuple:
+        """ Returns the compiled prefixes of a guild, mentions first and the longest prefixes before their substrings. """
         try:
-            prefix = self.prefixes[message.guild.id]
+            return self.prefix_matchers[guild_id]
         except KeyError:
-            prefix = [x['prefix'] for x in await bot.db.fetch('SELECT prefix FROM pre WHERE guild_id = $1', message.guild.id)] or self.PRE
-            self.prefixes[message.guild.id] = prefix
-
-        should_noprefix = False
-        if not message.content.startswith(('jishaku', 'eval', 'jsk', 'ev', 'rall', 'dev', 'rmsg')):
-            pass
-        elif not message.guild:
-            should_noprefix = True
-        elif not message.guild.get_member(788278464474120202):
-            should_noprefix = True
-
-        if await bot.is_owner(message.author) and (bot.noprefix is True or should_noprefix):
-            return commands.when_mentioned_or(*prefix, "")(bot, message) if not raw_prefix else prefix
-        return commands.when_mentioned_or(*prefix)(bot, message) if not raw_prefix else prefix
+            prefixes = self.prefixes.get(guild_id, self.PRE) if guild_id else self.PRE
+            user_id = self.user.id
+            matcher = self.prefix_matchers[guild_id] = (f'<@{user_id}> ', f'<@!{user_id}> ',
+                                                        *sorted(prefixes, key=len, reverse=True))
+            return matcher
+
+    def update_prefixes(self, guild_id: int, prefixes: typing.Sequence[str]) -> None:
+        self.prefixes[guild_id] = prefixes
+        self.prefix_matchers.pop(guild_id, None)
+
+    async def _fetch_guild_prefixes(self, guild_id: int) -> typing.Sequence[str]:
+        prefixes = [x['prefix'] for x in await self.db.fetch('SELECT prefix FROM pre WHERE guild_id = $1', guild_id)]
+        # Guilds without rows are cached with the default prefixes, so they are never queried again.
+        self.update_prefixes(guild_id, prefixes or self.PRE)
+        return self.prefixes[guild_id]
+
+    async def get_pre(self, bot, message: discord.Message, raw_prefix: Optional[bool] = False) -> typing.Sequence[str]:
+        if not message or not message.guild:
+            return self.get_prefix_matcher(None) if not raw_prefix else self.PRE
+        guild_id = message.guild.id
+        try:
+            prefix = self.prefixes[guild_id]
+        except KeyError:
+            # Concurrent cache misses for the same guild share one query.
+            task = self._prefix_fetches.get(guild_id)
+            if not task:
+                task = self._prefix_fetches[guild_id] = self.loop.create_task(self._fetch_guild_prefixes(guild_id))
+                task.add_done_callback(lambda _: self._prefix_fetches.pop(guild_id, None))
+            prefix = await task
+        if raw_prefix:
+            return prefix
+
+        matcher = self.get_prefix_matcher(guild_id)
+        if message.author.id == self.owner_id and (
+                self.noprefix is True or (message.content.startswith(self.NO_PREFIX_COMMANDS)
+                                          and not message.guild.get_member(788278464474120202))):
+            return matcher + ('',)
+        return matcher
 
     async def fetch_prefixes(self, message):
         prefixes = [x['prefix'] for x in await self.db.fetch('SELECT prefix FROM pre WHERE guild_id = $1', message.guild.id)]
@@ -206,6 +286,7 @@ class DuckBot(slash_utils.Bot):
         logging.info("\033[42mLogged in as " + self.user.name + "\033[0m")
 
     async def on_message(self, message: discord.Message) -> None:
+        self.message_router.dispatch(message)
         await self.wait_until_ready()
         if self.user:
             if re.fullmatch(rf"<@!?{bot.user.id}>", message.content):
@@ -217,24 +298,10 @@ class DuckBot(slash_utils.Bot):
         await self.process_commands(message)
 
     async def on_error(self, event_method: str, *args: Any, **kwargs: Any) -> None:
-        traceback_string = traceback.format_exc()
-        for line in traceback_string.split('\n'):
-            logging.info(line)
-        await self.wait_until_ready()
-        error_channel = self.get_channel(880181130408636456)
-        to_send = f"```yaml\nAn error occurred in an {event_method} event``````py" \
-                  f"\n{traceback_string}\n```"
-        if len(to_send) < 2000:
-            try:
-                await error_channel.send(to_send)
-
-            except (discord.Forbidden, discord.HTTPException):
-
-                await error_channel.send(f"```yaml\nAn error occurred in an {event_method} event``````py",
-                                         file=discord.File(io.StringIO(traceback_string), filename='traceback.py'))
-        else:
-            await error_channel.send(f"```yaml\nAn error occurred in an {event_method} event``````py",
-                                     file=discord.File(io.StringIO(traceback_string), filename='traceback.py'))
+        error = sys.exc_info()[1]
+        if error is None:
+            return
+        await self.error_reporter.report(error, header=f'An error occurred in an {event_method} event')
 
     async def create_gist(self, *, filename: str, description: str, content: str, public: bool = True):
         headers = {
@@ -283,99 +350,210 @@ class DuckBot(slash_utils.Bot):
         request = await self.dagpi_client.image_process(feature, url, **kwargs)
         return discord.File(fp=request.image, filename=f"DuckBot-{str(feature)}.{request.format}")
 
-    def update_log(self, deliver_type: str, webhook_url: str, guild_id: int):
+    def update_log(self, deliver_type: str, webhook_url: str, guild_id: int, channel_id: int = None):
         guild_id = getattr(guild_id, 'id', guild_id)
-        if deliver_type == 'default':
-            self.log_channels[guild_id]._replace(default=webhook_url)
-        elif deliver_type == 'message':
-            self.log_channels[guild_id]._replace(message=webhook_url)
-        elif deliver_type == 'member':
-            self.log_channels[guild_id]._replace(member=webhook_url)
-        elif deliver_type == 'join_leave':
-            self.log_channels[guild_id]._replace(join_leave=webhook_url)
-        elif deliver_type == 'voice':
-            self.log_channels[guild_id]._replace(voice=webhook_url)
-        elif deliver_type == 'server':
-            self.log_channels[guild_id]._replace(server=webhook_url)
+        routes = self.log_channels.get(guild_id)
+        if routes:
+            routes.update(deliver_type, webhook_url, channel_id)
 
     async def populate_cache(self):
         try:
             await self.wait_for('pool_create', timeout=10)
         except asyncio.TimeoutError:
             pass
-        _temp_prefixes = defaultdict(list)
-        for x in await self.db.fetch('SELECT * FROM pre'):
-            _temp_prefixes[x['guild_id']].append(x['prefix'] or self.PRE)
-        self.prefixes = dict(_temp_prefixes)
+        started = time.perf_counter()
+
+        async def _timed(name: str, coro):
+            stage_start = time.perf_counter()
+            try:
+                await coro
+            except Exception as e:
+                # One table failing to load must not keep the others, or cache_ready, from going through.
+                logging.error(f'Cache stage {name!r} failed to load', exc_info=e)
+                return
+            logging.info(f'Cache stage {name!r} loaded in {(time.perf_counter() - stage_start) * 1000:.2f}ms')
+
+        # Every loader copies its cache before querying and merges the result into it, so a
+        # change made while the query runs is kept instead of being overwritten by older rows.
+        async def _load_prefixes():
+            before = dict(self.prefixes)
+            _temp_prefixes = defaultdict(list)
+            for x in await self.db.fetch('SELECT * FROM pre'):
+                _temp_prefixes[x['guild_id']].append(x['prefix'] or self.PRE)
+            merge_cache(self.prefixes, dict(_temp_prefixes), before)
+            self.prefix_matchers.clear()
+
+        async def _load_blacklist():
+            before = dict(self.blacklist)
+            merge_cache(self.blacklist, dict([(r['user_id'], (r['is_blacklisted'] or False)) for r in
+                                              (await self.db.fetch("SELECT user_id, is_blacklisted FROM blacklist"))]), before)
+
+        async def _load_welcome_channels():
+            before = dict(self.welcome_channels)
+            merge_cache(self.welcome_channels, dict([(r['guild_id'], (r['welcome_channel'] or None)) for r in
+                                                     (await self.db.fetch("SELECT guild_id, welcome_channel FROM prefixes"))]), before)
+
+        async def _load_afk():
+            self.afk.load(await self.db.fetch('SELECT user_id, start_time, reason, auto_un_afk FROM afk'))
+
+        async def _load_suggestions():
+            before = dict(self.suggestion_channels)
+            merge_cache(self.suggestion_channels, dict([(r['channel_id'], r['image_only']) for r in
+                                                        (await self.db.fetch('SELECT channel_id, image_only FROM suggestions'))]), before)
+
+        async def _load_counting():
+            before_channels, before_rewards = dict(self.counting_channels), dict(self.counting_rewards)
+            counting_channels = dict((x['guild_id'], {'channel': x['channel_id'],
+                                                      'number': x['current_number'],
+                                                      'last_counter': x['last_counter'],
+                                                      'delete_messages': x['delete_messages'],
+                                                      'reset': x['reset_on_fail'],
+                                                      'history': CountHistory()})
+                                     for x in await self.db.fetch('SELECT * FROM count_settings'))
+            # Counts that were made since boot and are not saved yet are newer than what the database has.
+            for guild_id, settings in self.counting_channels.items():
+                if guild_id in counting_channels and self.counting.is_dirty(guild_id):
+                    counting_channels[guild_id] = settings
+            merge_cache(self.counting_channels, counting_channels, before_channels)
+
+            counting_rewards = {}
+            for x in await self.db.fetch('SELECT guild_id, reward_number, reward_message, role_to_grant, '
+                                         'reaction_to_add FROM counting'):
+                counting_rewards.setdefault(x['guild_id'], {})[x['reward_number']] = {
+                    'reward_message': x['reward_message'],
+                    'role_to_grant': x['role_to_grant'],
+                    'reaction_to_add': x['reaction_to_add']}
+            merge_cache(self.counting_rewards, counting_rewards, before_rewards)
+
+        async def _load_logging():
+            before_channels, before_loggings = dict(self.log_channels), dict(self.guild_loggings)
+            # One set-based upsert for every logging guild instead of one INSERT per guild.
+            await self.db.execute('INSERT INTO logging_events(guild_id) SELECT guild_id FROM log_channels '
+                                  'ON CONFLICT (guild_id) DO NOTHING')
+            entries = await self.db.fetch(
+                'SELECT l.*, ' + ', '.join(f'e.{flag}' for flag in LoggingEventsFlags.VALID_FLAGS) +
+                ' FROM log_channels l INNER JOIN logging_events e ON l.guild_id = e.guild_id')
+            log_channels, guild_loggings = {}, {}
+            for entry in entries:
+                guild_id = entry['guild_id']
+                log_channels[guild_id] = GuildLogRoutes.from_record(entry)
+                guild_loggings[guild_id] = LoggingEventsFlags(
+                    **{flag: entry[flag] for flag in LoggingEventsFlags.VALID_FLAGS})
+            merge_cache(self.log_channels, log_channels, before_channels)
+            merge_cache(self.guild_loggings, guild_loggings, before_loggings)
 
         async def _populate_guild_cache():
             await self.wait_until_ready()
             for guild in self.guilds:
-                try:
-                    self.prefixes[guild.id]
-                except KeyError:
-                    self.prefixes[guild.id] = self.PRE
-        self.loop.create_task(_populate_guild_cache())
-
-        values = await self.db.fetch("SELECT user_id, is_blacklisted FROM blacklist")
-        for value in values:
-            self.blacklist[value['user_id']] = (value['is_blacklisted'] or False)
-
-        values = await self.db.fetch("SELECT guild_id, welcome_channel FROM prefixes")
-        for value in values:
-            self.welcome_channels[value['guild_id']] = (value['welcome_channel'] or None)
-
-        self.afk_users = dict(
-            [(r['user_id'], True) for r in (await self.db.fetch('SELECT user_id, start_time FROM afk')) if
-             r['start_time']])
-        self.auto_un_afk = dict(
-            [(r['user_id'], r['auto_un_afk']) for r in (await self.db.fetch('SELECT user_id, auto_un_afk FROM afk')) if
-             r['auto_un_afk'] is not None])
-        self.suggestion_channels = dict([(r['channel_id'], r['image_only']) for r in
-                                         (await self.db.fetch('SELECT channel_id, image_only FROM suggestions'))])
-        self.counting_channels = dict((x['guild_id'], {'channel': x['channel_id'],
-                                                       'number': x['current_number'],
-                                                       'last_counter': x['last_counter'],
-                                                       'delete_messages': x['delete_messages'],
-                                                       'reset': x['reset_on_fail'],
-                                                       'last_message_id': None,
-                                                       'messages': deque(maxlen=100)})
-                                      for x in await self.db.fetch('SELECT * FROM count_settings'))
-
-        for x in await bot.db.fetch('SELECT * FROM counting'):
-            try:
-                self.counting_rewards[x['guild_id']].add(x['reward_number'])
-            except KeyError:
-                self.counting_rewards[x['guild_id']] = {x['reward_number']}
-
-        for entry in await self.db.fetch('SELECT * FROM log_channels'):
-            guild_id = entry['guild_id']
-            await bot.db.execute('INSERT INTO logging_events(guild_id) VALUES ($1) ON CONFLICT (guild_id) DO NOTHING',
-                                 entry['guild_id'])
-
-            self.log_channels[guild_id] = self.log_webhooks(default=entry['default_channel'],
-                                                            message=entry['message_channel'],
-                                                            join_leave=entry['join_leave_channel'],
-                                                            member=entry['member_channel'],
-                                                            voice=entry['voice_channel'],
-                                                            server=entry['server_channel'])
-
-            flags = dict(await bot.db.fetchrow(
-                'SELECT message_delete, message_purge, message_edit, member_join, member_leave, member_update, user_ban, user_unban, '
-                'user_update, invite_create, invite_delete, voice_join, voice_leave, voice_move, voice_mod, emoji_create, emoji_delete, '
-                'emoji_update, sticker_create, sticker_delete, sticker_update, server_update, stage_open, stage_close, channel_create, '
-                'channel_delete, channel_edit, role_create, role_delete, role_edit FROM logging_events WHERE guild_id = $1',
-                guild_id))
-            self.guild_loggings[guild_id] = LoggingEventsFlags(**flags)
-
-        logging.info('All cache populated successfully')
-        self.dispatch('cache_ready')
+                if guild.id not in self.prefixes:
+                    self.update_prefixes(guild.id, self.PRE)
+
+        # The table loads are independent of each other, so they can run on separate pool connections.
+        try:
+            await asyncio.gather(
+                _timed('prefixes', _load_prefixes()),
+                _timed('blacklist', _load_blacklist()),
+                _timed('welcome_channels', _load_welcome_channels()),
+                _timed('afk', _load_afk()),
+                _timed('suggestions', _load_suggestions()),
+                _timed('counting', _load_counting()),
+                _timed('logging', _load_logging()),
+            )
+            self.loop.create_task(_populate_guild_cache())
+            logging.info(f'All cache populated in {(time.perf_counter() - started) * 1000:.2f}ms')
+        finally:
+            # The suggestion and counting routes are limited to the channels and guilds just loaded.
+            self.message_router.invalidate()
+            # Log delivery waits for this, so it is set even if loading was cut short.
+            self.cache_ready.set()
+            self.dispatch('cache_ready')
+
+    def dump_cache_snapshot(self) -> None:
+        """
+        Writes the in-memory caches to disk as JSON so the next boot can serve them before the database is ready.
+        Log webhook URLs are credentials, so only the log channel ids are written; the URLs are reloaded from the database.
+        """
+        snapshot = {
+            'version': CACHE_SNAPSHOT_VERSION,
+            'created_at': time.time(),
+            'prefixes': self.prefixes,
+            'blacklist': self.blacklist,
+            'afk': {user_id: (entry.start_time.isoformat() if entry.start_time else None, entry.reason, entry.auto_un_afk)
+                    for user_id, entry in self.afk.entries.items()},
+            'suggestion_channels': self.suggestion_channels,
+            'counting_channels': {guild_id: {k: v for k, v in settings.items() if k != 'history'}
+                                  for guild_id, settings in self.counting_channels.items()},
+            'counting_rewards': self.counting_rewards,
+            'log_channels': {guild_id: [channel_id for channel_id, _ in routes.as_tuple()]
+                             for guild_id, routes in self.log_channels.items()},
+            'guild_loggings': {guild_id: flags.value for guild_id, flags in self.guild_loggings.items()},
+        }
+        temp_path = f'{CACHE_SNAPSHOT_PATH}.tmp'
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.fchmod(fd, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, CACHE_SNAPSHOT_PATH)
+        logging.info(f'Cache snapshot written to {CACHE_SNAPSHOT_PATH}')
+
+    def load_cache_snapshot(self) -> None:
+        """ Loads the caches written by dump_cache_snapshot. populate_cache reconciles them against the database later. """
+        try:
+            with open(CACHE_SNAPSHOT_PATH) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logging.error('Could not load the cache snapshot', exc_info=e)
+            return
+        if snapshot.get('version') != CACHE_SNAPSHOT_VERSION:
+            logging.info('Ignoring cache snapshot written by a different version')
+            return
+
+        # JSON object keys are strings, the caches are keyed by ids.
+        def by_id(data: dict) -> dict:
+            return {int(key): value for key, value in data.items()}
+
+        self.prefixes = by_id(snapshot['prefixes'])
+        self.blacklist = by_id(snapshot['blacklist'])
+        self.afk.load((user_id, datetime.datetime.fromisoformat(start_time) if start_time else None, reason, auto_un_afk)
+                      for user_id, (start_time, reason, auto_un_afk) in by_id(snapshot['afk']).items())
+        self.suggestion_channels = by_id(snapshot['suggestion_channels'])
+        self.counting_channels = {guild_id: {**settings, 'history': CountHistory()}
+                                  for guild_id, settings in by_id(snapshot['counting_channels']).items()}
+        self.counting_rewards = {guild_id: by_id(rewards) for guild_id, rewards in by_id(snapshot['counting_rewards']).items()}
+        self.log_channels = {guild_id: GuildLogRoutes.from_tuple([(channel_id, None) for channel_id in channel_ids])
+                             for guild_id, channel_ids in by_id(snapshot['log_channels']).items()}
+        self.guild_loggings = {guild_id: LoggingEventsFlags(value)
+                               for guild_id, value in by_id(snapshot['guild_loggings']).items()}
+        logging.info(f'Cache snapshot loaded ({time.time() - snapshot["created_at"]:.0f}s old)')
 
     async def start(self, *args, **kwargs):
         self.session = aiohttp.ClientSession()
+        self.command_usage.start()
+        self.afk.start()
+        self.counting.start()
+        self.error_reporter.start()
+        if self.log_outbox:
+            for outbox_id, guild_id, deliver_type, embed, attachment, queued_at in await self.log_outbox.open():
+                self.log_cache[guild_id][deliver_type].append(PendingLog(discord.Embed.from_dict(embed), queued_at=queued_at,
+                                                                         attachment=attachment, outbox_id=outbox_id))
         await super().start(*args, **kwargs)
 
     async def close(self):
+        try:
+            self.dump_cache_snapshot()
+        except Exception as e:
+            logging.error('Could not write the cache snapshot', exc_info=e)
+        await self.command_usage.close()
+        await self.afk.close()
+        await self.counting.close()
+        await self.error_reporter.close()
+        # Queue the log digests still being collected, so the outbox keeps them.
+        if logging_cog := self.get_cog('LoggingBackend'):
+            logging_cog.coalescer.close()
+        if self.log_outbox:
+            await self.log_outbox.close()
         await self.db.close()
         await self.session.close()
         await super().close()
@@ -1,17 +1,37 @@
 import asyncio
+import io
+import logging
+import os
 from collections import namedtuple
 
+import aiohttp
 import discord
 import typing
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from DuckBot.__main__ import DuckBot
 from DuckBot.helpers import constants
+from DuckBot.helpers.audit_log import AuditLogCorrelator
+from DuckBot.helpers.embed_packing import take_batch
+from DuckBot.helpers.log_coalescer import BurstCoalescer
+from DuckBot.helpers.log_queue import LogQueue, PendingLog
+from DuckBot.helpers.message_store import StoredMessage
+from DuckBot.helpers.webhook_sender import WebhookSender
 
 guild_channels = typing.Union[discord.TextChannel, discord.VoiceChannel, discord.CategoryChannel, discord.TextChannel]
+MAX_PENDING_LOGS_PER_GUILD = int(os.getenv('LOG_MAX_PENDING_PER_GUILD') or 1000)
+LOG_RETRY_DELAY = 5.0
 invalidated_webhook = 'https://canary.discord.com/api/webhooks/000000000000000000/_LQ1qItzrwhNj47TZEagmEgnjBJhCeLIIAE48M61S3XojN5bQuq8JM_kjv4cwCglYJlp'
 
 
+# kind: (deliver type, digest title, digest colour)
+COALESCED_LOGS = {
+    'member_join': ('join_leave', 'members joined', discord.Colour.green()),
+    'member_leave': ('join_leave', 'members left', discord.Colour(0xF4D58C)),
+    'voice': ('voice', 'voice channel updates', discord.Colour.blurple()),
+}
+
+
 def setup(bot):
     bot.add_cog(LoggingBackend(bot))
 
@@ -20,60 +40,109 @@ class LoggingBackend(commands.Cog):
 
     def __init__(self, bot):
         self.bot: DuckBot = bot
-        self.deliver_logs.start()
+        self.sender = WebhookSender(bot)
+        self.queue = LogQueue(bot, self.deliver_logs, max_per_guild=MAX_PENDING_LOGS_PER_GUILD)
+        self.queue.start()
+        self.coalescer = BurstCoalescer(bot.loop, self.log_digest)
+        self.audit_log = AuditLogCorrelator()
+        self.bot.message_router.add_route(self.store_logged_message, predicate=lambda m: self.stores_messages(m.guild.id))
         _nt_send_to = namedtuple('send_to', ['default', 'message', 'member', 'join_leave', 'voice', 'server'])
         self.send_to = _nt_send_to(default='default', message='message', member='member', join_leave='join_leave', server='server', voice='voice')
 
     def cog_unload(self) -> None:
-        self.deliver_logs.cancel()
+        self.coalescer.close()
+        self.queue.close()
+        self.audit_log.close()
+        self.bot.message_router.remove_routes(self)
 
     def log(self, embed, *, guild: typing.Union[discord.Guild, int], send_to: str = 'default'):
         guild_id = getattr(guild, 'id', guild)
         if guild_id in self.bot.log_channels:
-            self.bot.log_cache[guild_id][send_to].append(embed)
-
-    @tasks.loop(seconds=3)
-    async def deliver_logs(self):
-        for guild_id, webhooks in self.bot.log_channels.items():
-            for deliver_type, cache in self.bot.log_cache[guild_id].items():
-
-                embeds = self.bot.log_cache[guild_id][deliver_type][:10]
-                self.bot.log_cache[guild_id][deliver_type] = self.bot.log_cache[guild_id][deliver_type][10:]
-                webhook_url = getattr(webhooks, deliver_type, None)
-                if embeds:
-                    if webhook_url:
-                        webhook = discord.Webhook.from_url(webhook_url or invalidated_webhook, bot_token=self.bot.http.token, session=self.bot.session)
-                        try:
-                            await webhook.send(embeds=embeds)
-                        except discord.NotFound:
-                            self.bot.loop.create_task(self.create_and_deliver(embeds=embeds, deliver_type=deliver_type, guild_id=guild_id))
-                            await asyncio.sleep(1)
-                        except Exception as e:
-                            print('Error during task!')
-                            print(e)
-                    else:
-                        deliver_type = self.send_to.default
-                        webhook_url = webhooks.default
-                        webhook = discord.Webhook.from_url(webhook_url or invalidated_webhook, bot_token=self.bot.http.token, session=self.bot.session)
-                        try:
-                            await webhook.send(embeds=embeds)
-                        except discord.NotFound:
-                            self.bot.loop.create_task(self.create_and_deliver(embeds=embeds, deliver_type=deliver_type, guild_id=guild_id))
-                            await asyncio.sleep(1)
-                        except Exception as e:
-                            print('Error during task!')
-                            print(e)
-
-    @deliver_logs.before_loop
-    async def wait(self):
-        await self.bot.wait_until_ready()
-
-    async def create_and_deliver(self, embeds: typing.List[discord.Embed], deliver_type: str, guild_id: int):
-        if deliver_type not in {'default', 'message', 'member', 'join_leave', 'voice', 'server'}:
-            raise AttributeError('Improper delivery type passed')
-        chennel_ids = await self.bot.db.fetchrow(f'SELECT * FROM log_channels WHERE guild_id = $1', guild_id)
-        channel_id = chennel_ids[f"{deliver_type}_chid"]
-        channel: discord.TextChannel = self.bot.get_channel(channel_id)
+            self.queue.put(guild_id, send_to, embed)
+
+    def log_coalesced(self, embed: discord.Embed, *, guild: discord.Guild, kind: str, line: str):
+        """ Logs the embed, unless this kind of event is bursting in the guild; then only the line goes into a digest. """
+        if guild.id not in self.bot.log_channels:
+            return
+        if not self.coalescer.submit((guild.id, kind), line):
+            self.log(embed, guild=guild, send_to=COALESCED_LOGS[kind][0])
+
+    def log_digest(self, key: typing.Tuple[int, str], lines: typing.List[str], seconds: float):
+        guild_id, kind = key
+        send_to, title, colour = COALESCED_LOGS[kind]
+        embed = discord.Embed(title=f'{len(lines)} {title} in {seconds:.0f}s', colour=colour, timestamp=discord.utils.utcnow(),
+                              description=discord.utils.escape_markdown('\n'.join(lines[:15]))[:4000])
+        if len(lines) > 15:
+            embed.set_footer(text=f'And {len(lines) - 15} more. The full list is attached.')
+        if guild_id in self.bot.log_channels:
+            self.queue.put(guild_id, send_to, embed, attachment='\n'.join(lines) if len(lines) > 15 else None)
+
+    async def add_actor(self, embed: discord.Embed, guild: discord.Guild, target_id: int,
+                        *actions: discord.AuditLogAction) -> typing.Optional[discord.AuditLogEntry]:
+        """ Adds who did it, and why, to the embed if the audit log tells. """
+        entry = await self.audit_log.find(guild, target_id, *actions)
+        if entry and entry.user:
+            embed.add_field(name='By:', value=f'{entry.user.mention} ({discord.utils.escape_markdown(str(entry.user))})'
+                                              + (f'\n**Reason:** {entry.reason[0:900]}' if entry.reason else ''), inline=False)
+        return entry
+
+    async def deliver_logs(self, guild_id: int, deliver_type: str, cache: typing.Deque[PendingLog]) -> typing.Optional[float]:
+        if not self.bot.cache_ready.is_set():
+            # Routes restored from the cache snapshot have no webhook URLs until the database is loaded.
+            return 1.0
+        routes = self.bot.log_channels.get(guild_id)
+        if not routes:
+            # Logging was disabled for the guild, or the bot left it, after these logs were queued.
+            self.queue.drop_guild(guild_id)
+            return
+        webhook_url = routes.webhook_url(deliver_type)
+        if not webhook_url:
+            deliver_type = self.send_to.default
+            webhook_url = routes.default.webhook_url
+        webhook_url = webhook_url or invalidated_webhook
+        if delay := self.sender.delay(webhook_url):
+            return delay
+
+        batch = take_batch(cache, lambda log: log.size)
+        embeds = [log.embed for log in batch]
+        files = [(f'log-{index}.txt', log.attachment) for index, log in enumerate(batch) if log.attachment]
+        try:
+            retry_after = await self.sender.send(webhook_url, embeds=embeds, files=files,
+                                                 enqueued_at=[log.queued_at for log in batch])
+        except discord.NotFound:
+            self.bot.loop.create_task(self.create_and_deliver(embeds=embeds, deliver_type=deliver_type, guild_id=guild_id,
+                                                              files=[discord.File(io.StringIO(text), filename=name) for name, text in files]))
+            self.queue.done(batch)
+            return 1
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.warning('Could not reach the log webhook of guild %s, retrying', guild_id, exc_info=e)
+            cache.extendleft(reversed(batch))
+            return LOG_RETRY_DELAY
+        except discord.HTTPException as e:
+            if e.status >= 500:
+                logging.warning('Discord failed to deliver logs for guild %s, retrying', guild_id, exc_info=e)
+                cache.extendleft(reversed(batch))
+                return LOG_RETRY_DELAY
+            # The batch itself was rejected, so sending it again would fail the same way.
+            logging.error('Failed to deliver logs for guild %s', guild_id, exc_info=e)
+            self.queue.done(batch)
+            return
+        except Exception as e:
+            logging.error('Failed to deliver logs for guild %s', guild_id, exc_info=e)
+            self.queue.done(batch)
+            return
+        if retry_after:
+            cache.extendleft(reversed(batch))
+            return retry_after
+        self.queue.done(batch)
+
+    async def create_and_deliver(self, embeds: typing.List[discord.Embed], deliver_type: str, guild_id: int,
+                                 files: typing.List[discord.File] = None):
+        routes = self.bot.log_channels.get(guild_id)
+        if not routes:
+            return
+        route = routes.route(deliver_type)
+        channel: discord.TextChannel = self.bot.get_channel(route.channel_id)
         if not channel and deliver_type != self.send_to.default:
             for e in embeds:
                 e.footer.text = e.footer.text + f'\nCould not deliver to the {deliver_type} channel. Sent here instead!\n' \
@@ -88,20 +157,13 @@ class LoggingBackend(commands.Cog):
                     break
             else:
                 webhook = await channel.create_webhook(name='DuckBot Logging', avatar=await self.bot.user.avatar.read(), reason='DuckBot Logging channel')
-            await self.bot.db.execute(f'UPDATE log_channels SET {deliver_type}_channel = $1', webhook.url)
-            if deliver_type == 'default':
-                self.bot.log_channels[channel.guild.id]._replace(default=webhook.url)
-            elif deliver_type == 'message':
-                self.bot.log_channels[channel.guild.id]._replace(message=webhook.url)
-            elif deliver_type == 'member':
-                self.bot.log_channels[channel.guild.id]._replace(member=webhook.url)
-            elif deliver_type == 'join_leave':
-                self.bot.log_channels[channel.guild.id]._replace(join_leave=webhook.url)
-            elif deliver_type == 'voice':
-                self.bot.log_channels[channel.guild.id]._replace(voice=webhook.url)
-            elif deliver_type == 'server':
-                self.bot.log_channels[channel.guild.id]._replace(server=webhook.url)
-            await webhook.send(embeds=embeds)
+            if webhook.url != route.webhook_url:
+                await self.bot.db.execute(f'UPDATE log_channels SET {deliver_type}_channel = $2 WHERE guild_id = $1',
+                                          guild_id, webhook.url)
+                if route.webhook_url:
+                    self.sender.forget(route.webhook_url)
+                routes.update(deliver_type, webhook.url)
+            await webhook.send(embeds=embeds, files=files or discord.utils.MISSING)
         elif not deliver_type != self.send_to.default:
             for e in embeds:
                 e.footer.text = e.footer.text + f'\nCould not deliver to the {deliver_type} channel. Sent here instead!\n' \
@@ -112,39 +174,62 @@ class LoggingBackend(commands.Cog):
                                f'\nPlease check if I have the **Manage Webhook** permissions in all the log channels!'
                                f'\nAnd also check that {channel.mention} has less than 10 webhooks, **or** it already has one webhook owned by {channel.guild.me.mention}')
 
-    @commands.Cog.listener('on_message_delete')
-    async def logger_on_message_delete(self, message: discord.Message) -> None:
-        if message.author.bot or not message.guild or message.guild.id not in self.bot.log_channels or not self.bot.guild_loggings[message.guild.id].message_delete:
+    def stores_messages(self, guild_id: typing.Optional[int]) -> bool:
+        if guild_id not in self.bot.log_channels:
+            return False
+        flags = self.bot.guild_loggings[guild_id]
+        return flags.message_delete or flags.message_edit or flags.message_purge
+
+    # Routed through bot.message_router, for guilds that log deleted or edited messages.
+    async def store_logged_message(self, message: discord.Message):
+        self.bot.message_store.add(message)
+
+    def stored_message(self, message_id: int, cached: typing.Optional[discord.Message]) -> typing.Optional[StoredMessage]:
+        """ The stored copy of a message, or one made from discord.py's cache if it is only there. """
+        stored = self.bot.message_store.get(message_id)
+        if not stored and cached and cached.guild and not cached.author.bot:
+            stored = StoredMessage(cached)
+        return stored
+
+    @commands.Cog.listener('on_raw_message_delete')
+    async def logger_on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent) -> None:
+        message = self.stored_message(payload.message_id, payload.cached_message)
+        self.bot.message_store.pop(payload.message_id)
+        if not message or not payload.guild_id or payload.guild_id not in self.bot.log_channels or not self.bot.guild_loggings[payload.guild_id].message_delete:
             return
-        if message.guild.id in self.bot.log_channels:
-            embed = discord.Embed(title=f'Message deleted in #{message.channel}',
-                                  description=(message.content or '\u200b')[0:4000],
-                                  colour=discord.Colour.red(), timestamp=discord.utils.utcnow())
-            embed.set_author(name=str(message.author), icon_url=message.author.display_avatar.url)
-            embed.set_footer(text=f"Channel: {message.channel.id}")
-            if message.attachments:
-                embed.add_field(name='Attachments:', value='\n'.join([a.filename for a in message.attachments]), inline=False)
-            if message.stickers:
-                embed.add_field(name='Stickers:', value='\n'.join([a.name for a in message.stickers]), inline=False)
-            self.log(embed, guild=message.guild, send_to=self.send_to.message)
+        channel = self.bot.get_channel(payload.channel_id)
+        embed = discord.Embed(title=f'Message deleted in #{channel}',
+                              description=(message.content or '\u200b')[0:4000],
+                              colour=discord.Colour.red(), timestamp=discord.utils.utcnow())
+        embed.set_author(name=message.author, icon_url=message.avatar_url)
+        embed.set_footer(text=f"Channel: {payload.channel_id}")
+        if message.attachments:
+            embed.add_field(name='Attachments:', value='\n'.join([filename for filename, url in message.attachments]), inline=False)
+        if message.stickers:
+            embed.add_field(name='Stickers:', value='\n'.join(message.stickers), inline=False)
+        self.log(embed, guild=payload.guild_id, send_to=self.send_to.message)
 
     @commands.Cog.listener('on_raw_bulk_message_delete')
     async def logger_on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        cached = {message.id: message for message in payload.cached_messages}
+        messages = [self.stored_message(message_id, cached.get(message_id)) for message_id in sorted(payload.message_ids)]
+        for message_id in payload.message_ids:
+            self.bot.message_store.pop(message_id)
         if not payload.guild_id or payload.guild_id not in self.bot.log_channels or not self.bot.guild_loggings[payload.guild_id].message_purge:
             return
         embed = discord.Embed(title=f'{len(payload.message_ids)} messages purged in #{self.bot.get_channel(payload.channel_id)}',
                               colour=discord.Colour.red(), timestamp=discord.utils.utcnow())
         msgs = []
-        for message in payload.cached_messages:
-            if message.author.bot:
+        for message in messages:
+            if not message:
                 continue
             if message.attachments:
-                attachment = f'{len(message.attachments)} attachments: ' + message.attachments[0].filename
+                attachment = f'{len(message.attachments)} attachments: ' + message.attachments[0][0]
             elif message.stickers:
-                attachment = 'Sticker: ' + message.stickers[0].name
+                attachment = 'Sticker: ' + message.stickers[0]
             else:
                 attachment = None
-            message = f"{discord.utils.remove_markdown(str(message.author))} > {message.content or attachment or '-'}"
+            message = f"{discord.utils.remove_markdown(message.author)} > {message.content or attachment or '-'}"
             if len(message) > 200:
                 message = message[0:200] + '...'
             msgs.append(message)
@@ -155,33 +240,40 @@ class LoggingBackend(commands.Cog):
         embed.set_footer(text=f'Channel: {payload.channel_id}')
         self.log(embed, guild=payload.guild_id, send_to=self.send_to.message)
 
-    @commands.Cog.listener('on_message_edit')
-    async def logger_on_message_edit(self, before: discord.Message, after: discord.Message):
-        if before.author.bot or not before.guild or before.guild.id not in self.bot.log_channels or not self.bot.guild_loggings[after.guild.id].message_edit:
-            return
-        if not self.bot.guild_loggings[before.guild.id].message_edit:
-            return
-        if before.guild.id in self.bot.log_channels:
-            if before.content == after.content and before.attachments == after.attachments and before.stickers == after.stickers:
-                return
-            embed = discord.Embed(title=f'Message edited in #{before.channel}',
-                                  colour=discord.Colour.blurple(), timestamp=discord.utils.utcnow())
-            embed.set_author(name=str(before.author), icon_url=before.author.display_avatar.url)
-            embed.set_footer(text=f"Channel: {before.channel.id}")
-
-            embed.add_field(name='**__Before:__**', value=before.content[0:1024], inline=False)
-            embed.add_field(name='**__After:__**', value=after.content[0:1024], inline=False)
-            if before.attachments and before.attachments != after.attachments:
-                af = after.attachments
-                attachments = []
-                for a in before.attachments:
-                    if a in af:
-                        attachments.append(a.filename)
-                    else:
-                        attachments.append(f"[Removed] ~~{a.filename}~~")
-                embed.add_field(name='Attachments:', value='\n'.join(attachments), inline=False)
-            embed.add_field(name='Jump:', value=f'[[Jump to message]]({after.jump_url})', inline=False)
-            self.log(embed, guild=before.guild, send_to=self.send_to.message)
+    @commands.Cog.listener('on_raw_message_edit')
+    async def logger_on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        data = payload.data
+        guild_id = int(data['guild_id']) if 'guild_id' in data else None
+        before = self.stored_message(payload.message_id, payload.cached_message)
+        if not before:
+            return
+        before_content, before_attachments = before.content, before.attachments
+        # The store is updated even when edits are not logged, so delete logs show the edited content.
+        self.bot.message_store.edit(payload.message_id, data)
+        if not guild_id or guild_id not in self.bot.log_channels or not self.bot.guild_loggings[guild_id].message_edit:
+            return
+        after_content = data.get('content', before_content)
+        after_urls = {a['url'] for a in data['attachments']} if 'attachments' in data else {url for _, url in before_attachments}
+        if before_content == after_content and {url for _, url in before_attachments} == after_urls:
+            return
+        channel = self.bot.get_channel(payload.channel_id)
+        embed = discord.Embed(title=f'Message edited in #{channel}',
+                              colour=discord.Colour.blurple(), timestamp=discord.utils.utcnow())
+        embed.set_author(name=before.author, icon_url=before.avatar_url)
+        embed.set_footer(text=f"Channel: {payload.channel_id}")
+
+        embed.add_field(name='**__Before:__**', value=(before_content or '\u200b')[0:1024], inline=False)
+        embed.add_field(name='**__After:__**', value=(after_content or '\u200b')[0:1024], inline=False)
+        if before_attachments and {url for _, url in before_attachments} != after_urls:
+            attachments = []
+            for filename, url in before_attachments:
+                if url in after_urls:
+                    attachments.append(filename)
+                else:
+                    attachments.append(f"[Removed] ~~{filename}~~")
+            embed.add_field(name='Attachments:', value='\n'.join(attachments), inline=False)
+        embed.add_field(name='Jump:', value=f'[[Jump to message]]({before.jump_url})', inline=False)
+        self.log(embed, guild=guild_id, send_to=self.send_to.message)
 
     @commands.Cog.listener('on_guild_channel_delete')
     async def logger_on_guild_channel_delete(self, channel: guild_channels):
@@ -195,6 +287,7 @@ class LoggingBackend(commands.Cog):
                                           f"\n**Created at:** {discord.utils.format_dt(channel.created_at)}",
                               colour=discord.Colour.red(), timestamp=discord.utils.utcnow())
         embed.set_footer(text=f'Channel ID: {channel.id}')
+        await self.add_actor(embed, channel.guild, channel.id, discord.AuditLogAction.channel_delete)
         self.log(embed, guild=channel.guild, send_to=self.send_to.server)
 
     @commands.Cog.listener('on_guild_channel_create')
@@ -214,6 +307,7 @@ class LoggingBackend(commands.Cog):
             if perms:
                 embed.add_field(name=f'Permissions for {target}', value='\n'.join(perms), inline=False)
         embed.set_footer(text=f'Channel ID: {channel.id}')
+        await self.add_actor(embed, channel.guild, channel.id, discord.AuditLogAction.channel_create)
         self.log(embed, guild=channel.guild, send_to=self.send_to.server)
 
     @commands.Cog.listener('on_guild_channel_update')
@@ -247,6 +341,8 @@ class LoggingBackend(commands.Cog):
                     embed.add_field(name=f'Updated {target}', value='\n'.join(updated_perms), inline=False)
             deliver = True
         if deliver:
+            await self.add_actor(embed, after.guild, after.id, discord.AuditLogAction.channel_update, discord.AuditLogAction.overwrite_create,
+                                 discord.AuditLogAction.overwrite_update, discord.AuditLogAction.overwrite_delete)
             self.log(embed, guild=after.guild, send_to=self.send_to.server)
 
     @commands.Cog.listener('on_invite_update')
@@ -263,7 +359,8 @@ class LoggingBackend(commands.Cog):
                                   f"\n**Using invite code:** [{invite.code}]({invite.url})"
                                   f"\n**Expires:** {discord.utils.format_dt(invite.expires_at) if invite.expires_at else 'Never'}"
                                   f"\n**Uses:** {invite.uses}/{invite.max_uses if invite.max_uses > 0 else 'unlimited'}", inline=False)
-        self.log(embed, guild=member.guild, send_to=self.send_to.join_leave)
+        self.log_coalesced(embed, guild=member.guild, kind='member_join',
+                           line=f'{member} ({member.id}) - created {member.created_at:%Y-%m-%d}' + (f' - invite {invite.code}' if invite else ''))
 
     @commands.Cog.listener('on_member_remove')
     async def logger_on_member_remove(self, member: discord.Member):
@@ -278,7 +375,11 @@ class LoggingBackend(commands.Cog):
         roles = [r for r in member.roles if not r.is_default()]
         if roles:
             embed.add_field(name='Roles', value=', '.join([r.mention for r in roles]), inline=True)
-        self.log(embed, guild=member.guild, send_to=self.send_to.join_leave)
+        line = f'{member} ({member.id})'
+        if kick := await self.add_actor(embed, member.guild, member.id, discord.AuditLogAction.kick):
+            embed.title = 'Member kicked'
+            line += f' - kicked by {kick.user}'
+        self.log_coalesced(embed, guild=member.guild, kind='member_leave', line=line)
 
     @commands.Cog.listener('on_member_update')
     async def logger_on_member_update(self, before: discord.Member, after: discord.Member):
@@ -401,6 +502,7 @@ class LoggingBackend(commands.Cog):
         enabled = ', '.join([str(name).replace('guild', 'server').replace('_', ' ').title() for name, value in set(role.permissions) if value is True])
         embed.add_field(name='Permissions enabled:', value=enabled, inline=False)
         embed.set_footer(text=f'Role ID: {role.id}')
+        await self.add_actor(embed, role.guild, role.id, discord.AuditLogAction.role_create)
         self.log(embed, guild=role.guild, send_to=self.send_to.server)
 
     @commands.Cog.listener('on_guild_role_delete')
@@ -416,6 +518,7 @@ class LoggingBackend(commands.Cog):
         enabled = ', '.join([str(name).replace('guild', 'server').replace('_', ' ').title() for name, value in set(role.permissions) if value is True])
         embed.add_field(name='Permissions enabled:', value=enabled, inline=False)
         embed.set_footer(text=f'Role ID: {role.id}')
+        await self.add_actor(embed, role.guild, role.id, discord.AuditLogAction.role_delete)
         self.log(embed, guild=role.guild, send_to=self.send_to.server)
 
     @commands.Cog.listener('on_guild_role_update')
@@ -475,6 +578,7 @@ class LoggingBackend(commands.Cog):
 
         embed.description = role_update + hoist_update + ping_update + color_update + position_update
         if deliver:
+            await self.add_actor(embed, after.guild, after.id, discord.AuditLogAction.role_update)
             self.log(embed, guild=after.guild, send_to=self.send_to.server)
 
     @commands.Cog.listener('on_guild_emojis_update')
@@ -585,25 +689,30 @@ class LoggingBackend(commands.Cog):
     async def logger_on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         if member.guild.id not in self.bot.log_channels:
             return
+
+        def voice_line(title: str) -> str:
+            channels = ' -> '.join(f'#{c}' for c in dict.fromkeys(c for c in (before.channel, after.channel) if c))
+            return f'{member} ({member.id}): {title.rstrip(":")} {channels}'
+
         if before.channel and after.channel and before.channel != after.channel and self.bot.guild_loggings[member.guild.id].voice_move:
             embed = discord.Embed(title='Member moved voice channels:', colour=discord.Colour.blurple(), timestamp=discord.utils.utcnow(),
                                   description=f"**From:** {before.channel.mention} ({after.channel.id})"
                                               f"\n**To:** {after.channel.mention} ({after.channel.id})")
             embed.set_author(name=str(member), icon_url=member.display_avatar.url)
             embed.set_footer(text=f"Member ID: {member.id}")
-            self.log(embed, guild=member.guild, send_to=self.send_to.voice)
+            self.log_coalesced(embed, guild=member.guild, kind='voice', line=voice_line(embed.title))
         if not before.channel and after.channel and self.bot.guild_loggings[member.guild.id].voice_join:
             embed = discord.Embed(title='Member joined a voice channel:', colour=discord.Colour.green(), timestamp=discord.utils.utcnow(),
                                   description=f"**Joined:** {after.channel.mention} ({after.channel.id})")
             embed.set_author(name=str(member), icon_url=member.display_avatar.url)
             embed.set_footer(text=f"Member ID: {member.id}")
-            self.log(embed, guild=member.guild, send_to=self.send_to.voice)
+            self.log_coalesced(embed, guild=member.guild, kind='voice', line=voice_line(embed.title))
         if before.channel and not after.channel and self.bot.guild_loggings[member.guild.id].voice_leave:
             embed = discord.Embed(title='Member left a voice channel:', colour=discord.Colour.red(), timestamp=discord.utils.utcnow(),
                                   description=f"**Left:** {before.channel.mention} ({before.channel.id})")
             embed.set_author(name=str(member), icon_url=member.display_avatar.url)
             embed.set_footer(text=f"Member ID: {member.id}")
-            self.log(embed, guild=member.guild, send_to=self.send_to.voice)
+            self.log_coalesced(embed, guild=member.guild, kind='voice', line=voice_line(embed.title))
         if not self.bot.guild_loggings[member.guild.id].voice_mod:
             return
         if before.deaf != after.deaf:
@@ -611,23 +720,23 @@ class LoggingBackend(commands.Cog):
                 embed = discord.Embed(title='Member Deafened by a Moderator', colour=discord.Colour.dark_gold(), timestamp=discord.utils.utcnow())
                 embed.set_author(name=str(member), icon_url=member.display_avatar.url)
                 embed.set_footer(text=f"Member ID: {member.id}")
-                self.log(embed, guild=member.guild, send_to=self.send_to.voice)
+                self.log_coalesced(embed, guild=member.guild, kind='voice', line=voice_line(embed.title))
             if before.deaf:
                 embed = discord.Embed(title='Member Un-deafened by a Moderator', colour=discord.Colour.yellow(), timestamp=discord.utils.utcnow())
                 embed.set_author(name=str(member), icon_url=member.display_avatar.url)
                 embed.set_footer(text=f"Member ID: {member.id}")
-                self.log(embed, guild=member.guild, send_to=self.send_to.voice)
+                self.log_coalesced(embed, guild=member.guild, kind='voice', line=voice_line(embed.title))
         if before.mute != after.mute:
             if after.mute:
                 embed = discord.Embed(title='Member Muted by a Moderator', colour=discord.Colour.dark_gold(), timestamp=discord.utils.utcnow())
                 embed.set_author(name=str(member), icon_url=member.display_avatar.url)
                 embed.set_footer(text=f"Member ID: {member.id}")
-                self.log(embed, guild=member.guild, send_to=self.send_to.voice)
+                self.log_coalesced(embed, guild=member.guild, kind='voice', line=voice_line(embed.title))
             if before.mute:
                 embed = discord.Embed(title='Member Un-muted by a Moderator', colour=discord.Colour.yellow(), timestamp=discord.utils.utcnow())
                 embed.set_author(name=str(member), icon_url=member.display_avatar.url)
                 embed.set_footer(text=f"Member ID: {member.id}")
-                self.log(embed, guild=member.guild, send_to=self.send_to.voice)
+                self.log_coalesced(embed, guild=member.guild, kind='voice', line=voice_line(embed.title))
 
     @commands.Cog.listener('on_stage_instance_create')
     async def logger_on_stage_instance_create(self, stage_instance: discord.StageInstance):
@@ -663,6 +772,7 @@ class LoggingBackend(commands.Cog):
                               description=f"**Account Created:** {discord.utils.format_dt(user.created_at)} ({discord.utils.format_dt(user.created_at, style='R')})")
         embed.set_author(name=str(user), icon_url=user.display_avatar.url)
         embed.set_footer(text=f"User ID: {user.id}")
+        await self.add_actor(embed, guild, user.id, discord.AuditLogAction.ban)
         self.log(embed, guild=guild, send_to=self.send_to.member)
 
     @commands.Cog.listener('on_member_unban')
@@ -673,6 +783,7 @@ class LoggingBackend(commands.Cog):
                               description=f"**Account Created:** {discord.utils.format_dt(user.created_at)} ({discord.utils.format_dt(user.created_at, style='R')})")
         embed.set_author(name=str(user), icon_url=user.display_avatar.url)
         embed.set_footer(text=f"User ID: {user.id}")
+        await self.add_actor(embed, guild, user.id, discord.AuditLogAction.unban)
         self.log(embed, guild=guild, send_to=self.send_to.member)
 
     @commands.Cog.listener('on_invite_create')
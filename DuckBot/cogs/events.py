@@ -1,17 +1,16 @@
 import copy
-import io
-import itertools
+import datetime
 import logging
 import random
 import re
 import traceback
+import typing
 import contextlib
 from collections import Counter
 
 import discord
 from discord.ext import commands, tasks
 from discord.ext.commands import BucketType
-import difflib
 
 from jishaku.paginators import WrappedPaginator
 
@@ -23,6 +22,12 @@ from DuckBot.helpers import time_inputs
 
 warned = []
 
+GUILD_DATA_TABLES = ('temporary_mutes', 'muted', 'counting', 'count_settings', 'logging_events', 'log_channels',
+                     'pre', 'prefixes')
+
+COMMAND_RETENTION_DAYS = 30
+COMMAND_PARTITIONS_AHEAD = 3
+
 
 def setup(bot):
     bot.add_cog(Handler(bot))
@@ -83,15 +88,25 @@ class Handler(commands.Cog, name='Handler'):
         self.bot: DuckBot = bot
         self.error_channel = 880181130408636456
         self.do_member_count_update.start()
-        self.cache_common_discriminators.start()
-        self.delete_old_records.start()
+        self.bot.loop.create_task(self.build_discriminator_index())
+        self.bot.loop.create_task(self.build_emoji_index())
+        self.manage_command_partitions.start()
         self.mapping = commands.CooldownMapping.from_cooldown(1, 2, commands.BucketType.user)
         self._auto_spam_count = Counter()
 
+        router = self.bot.message_router
+        router.add_route(self.on_afk_user_message, authors=lambda: self.bot.afk.afk_users)
+        router.add_route(self.on_afk_user_mention, predicate=lambda m: m.mentions and self.bot.afk.afk_users)
+        router.add_route(self.on_suggestion_receive, channels=lambda: self.bot.suggestion_channels)
+        router.add_route(self.on_count_receive, guilds=lambda: self.bot.counting_channels,
+                         predicate=lambda m: m.channel.id == self.bot.counting_channels[m.guild.id]['channel'])
+        router.add_route(self.emoji_sender, in_dms=True, authors=lambda: (self.bot.owner_id,),
+                         predicate=lambda _: self.bot.user.id == 788278464474120202)
+
     def cog_unload(self):
         self.do_member_count_update.cancel()
-        self.cache_common_discriminators.cancel()
-        self.delete_old_records.cancel()
+        self.manage_command_partitions.cancel()
+        self.bot.message_router.remove_routes(self)
 
     @commands.Cog.listener('on_command_error')
     async def error_handler(self, ctx: CustomContext, error):
@@ -118,29 +133,18 @@ class Handler(commands.Cog, name='Handler'):
         if isinstance(error, commands.CommandNotFound):
             if self.bot.maintenance is not None or ctx.author.id in self.bot.blacklist or ctx.prefix == '':
                 return
-            command_names = []
-            for command in [c for c in self.bot.commands]:
-                # noinspection PyBroadException
-                try:
-                    if await command.can_run(ctx):
-                        command_names.append([command.name] + command.aliases)
-                except:
-                    continue
+            match = await self.bot.command_index.suggest(ctx, ctx.invoked_with)
 
-            command_names = list(itertools.chain.from_iterable(command_names))
-
-            matches = difflib.get_close_matches(ctx.invoked_with, command_names)
-
-            if matches:
+            if match:
                 confirm = await ctx.confirm(message=f"Sorry, but the command **{ctx.invoked_with}** was not found."
-                                                    f"\n{f'**did you mean... `{matches[0]}`?**' if matches else ''}",
+                                                    f"\n**did you mean... `{match}`?**",
                                             delete_after_confirm=True, delete_after_timeout=True,
-                                            delete_after_cancel=True, buttons=(('▶', f'execute {matches[0]}', discord.ButtonStyle.gray),
+                                            delete_after_cancel=True, buttons=(('▶', f'execute {match}', discord.ButtonStyle.gray),
                                                                                ('🗑', None, discord.ButtonStyle.red)), timeout=15)
                 if confirm is True:
                     message = copy.copy(ctx.message)
                     message._edited_timestamp = discord.utils.utcnow()
-                    message.content = message.content.replace(ctx.invoked_with, matches[0])
+                    message.content = message.content.replace(ctx.invoked_with, match)
                     return await self.bot.process_commands(message)
                 else:
                     return
@@ -278,12 +282,8 @@ class Handler(commands.Cog, name='Handler'):
         if isinstance(error, commands.NSFWChannelRequired):
             return await ctx.send('This commands only works in NSFW channels')
 
-        error_channel = self.bot.get_channel(self.error_channel)
-
         await ctx.send(f"⚠ **An unexpected error occurred!**", view=ExceptionView(error, ctx.author.id))
 
-        traceback_string = "".join(traceback.format_exception(
-            etype=None, value=error, tb=error.__traceback__))
         if ctx.guild:
             command_data = f"by: {ctx.author.name} ({ctx.author.id})" \
                            f"\ncommand: {ctx.message.content[0:1700]}" \
@@ -295,28 +295,13 @@ class Handler(commands.Cog, name='Handler'):
             command_data = f"command: {ctx.message.content[0:1700]}" \
                            f"\nCommand executed in DMs"
 
-        to_send = f"```yaml\n{command_data}``````py\n{ctx.command} " \
-                  f"command raised an error:\n{traceback_string}\n```"
-        if len(to_send) < 2000:
+        sent_error = await self.bot.error_reporter.report(error, header=command_data,
+                                                          title=f"{ctx.command} command raised an error:\n")
+        if sent_error:
             try:
-                sent_error = await error_channel.send(to_send)
-
-            except (discord.Forbidden, discord.HTTPException):
-                sent_error = await error_channel.send(f"```yaml\n{command_data}``````py Command: {ctx.command}"
-                                                      f"Raised the following error:\n```",
-                                                      file=discord.File(io.StringIO(traceback_string),
-                                                                        filename='traceback.py'))
-        else:
-            sent_error = await error_channel.send(f"```yaml\n{command_data}``````py Command: {ctx.command}"
-                                                  f"Raised the following error:\n```",
-                                                  file=discord.File(io.StringIO(traceback_string),
-                                                                    filename='traceback.py'))
-        try:
-            await sent_error.add_reaction('🗑')
-        except (discord.HTTPException, discord.Forbidden):
-            pass
-        for line in traceback_string.split('\n'):
-            logging.info(line)
+                await sent_error.add_reaction('🗑')
+            except (discord.HTTPException, discord.Forbidden):
+                pass
 
     @commands.Cog.listener('on_raw_reaction_add')
     async def wastebasket(self, payload: discord.RawReactionActionEvent):
@@ -386,79 +371,100 @@ class Handler(commands.Cog, name='Handler'):
         else:
             print('User is not DuckBot! Did not post data to Top.gg')
 
-    @tasks.loop(minutes=5)
-    async def cache_common_discriminators(self):
-        discrims = [[m.discriminator for m in g.members if
-                     (m.premium_since or m.display_avatar.is_animated()) and (len(set(m.discriminator)) < 3)] for g in
-                    self.bot.guilds]
-        self.bot.common_discrims = sorted(list(set(itertools.chain(*discrims))))
+    async def build_discriminator_index(self):
+        await self.bot.wait_until_ready()
+        await self.bot.discriminator_index.build(self.bot.guilds)
+
+    @commands.Cog.listener('on_member_join')
+    async def index_member_discriminator(self, member: discord.Member):
+        self.bot.discriminator_index.update(member)
+
+    @commands.Cog.listener('on_member_update')
+    async def reindex_member_discriminator(self, _, after: discord.Member):
+        self.bot.discriminator_index.update(after)
+
+    @commands.Cog.listener('on_member_remove')
+    async def unindex_member_discriminator(self, member: discord.Member):
+        self.bot.discriminator_index.remove(member)
+
+    @commands.Cog.listener('on_user_update')
+    async def index_user_discriminator(self, before: discord.User, after: discord.User):
+        if before.discriminator != after.discriminator or before.avatar != after.avatar:
+            self.bot.discriminator_index.update_user(after)
+
+    @commands.Cog.listener('on_guild_join')
+    async def index_guild_discriminators(self, guild: discord.Guild):
+        self.bot.discriminator_index.add_guild(guild)
+
+    @commands.Cog.listener('on_guild_remove')
+    async def unindex_guild_discriminators(self, guild: discord.Guild):
+        self.bot.discriminator_index.remove_guild(guild)
+
+    async def build_emoji_index(self):
+        await self.bot.wait_until_ready()
+        self.bot.emoji_index.rebuild(self.bot.emojis)
+
+    @commands.Cog.listener('on_guild_join')
+    async def index_guild_emojis(self, guild: discord.Guild):
+        self.bot.emoji_index.add(guild.emojis)
+
+    @commands.Cog.listener('on_guild_remove')
+    async def unindex_guild_emojis(self, guild: discord.Guild):
+        self.bot.emoji_index.remove(guild.emojis)
+
+    @commands.Cog.listener('on_guild_emojis_update')
+    async def reindex_guild_emojis(self, _, before: typing.Sequence[discord.Emoji],
+                                   after: typing.Sequence[discord.Emoji]):
+        self.bot.emoji_index.remove(before)
+        self.bot.emoji_index.add(after)
 
-    @cache_common_discriminators.before_loop
     @do_member_count_update.before_loop
     async def wait(self):
         await self.bot.wait_until_ready()
 
-    @commands.Cog.listener('on_message')
+    # The on_message handlers below are routed through bot.message_router, which
+    # already filtered out DMs, bots, and the channels and users they do not act on.
+
     async def on_afk_user_message(self, message: discord.Message):
-        if not message.guild:
-            return
-        if message.author.bot:
+        entry = self.bot.afk.get(message.author.id)
+        if not entry or entry.auto_un_afk is False:
             return
-        if message.author.id in self.bot.afk_users:
-            try:
-                if self.bot.auto_un_afk[message.author.id] is False:
-                    return
-            except KeyError:
-                pass
-
-            self.bot.afk_users.pop(message.author.id)
 
-            info = await self.bot.db.fetchrow('SELECT * FROM afk WHERE user_id = $1', message.author.id)
-            await self.bot.db.execute('INSERT INTO afk (user_id, start_time, reason) VALUES ($1, null, null) '
-                                      'ON CONFLICT (user_id) DO UPDATE SET start_time = null, reason = null',
-                                      message.author.id)
+        info = self.bot.afk.clear_afk(message.author.id)
+        if not info:
+            return
+        start_time, reason = info
 
-            await message.channel.send(
-                f'**Welcome back, {message.author.mention}, afk since: {discord.utils.format_dt(info["start_time"], "R")}**'
-                f'\n**With reason:** {info["reason"]}', delete_after=10)
+        await message.channel.send(
+            f'**Welcome back, {message.author.mention}, afk since: {discord.utils.format_dt(start_time, "R")}**'
+            f'\n**With reason:** {reason}', delete_after=10)
 
-            await message.add_reaction('👋')
+        await message.add_reaction('👋')
 
-    @commands.Cog.listener('on_message')
     async def on_afk_user_mention(self, message: discord.Message):
-        if not message.guild:
-            return
-        if message.author.bot:
-            return
-        if message.mentions:
-            pinged_afk_user_ids = list(set([u.id for u in message.mentions]).intersection(self.bot.afk_users))
-            paginator = WrappedPaginator(prefix='', suffix='')
-            for user_id in pinged_afk_user_ids:
-                member = message.guild.get_member(user_id)
-                if member and member.id != message.author.id:
-                    info = await self.bot.db.fetchrow('SELECT * FROM afk WHERE user_id = $1', user_id)
-                    paginator.add_line(
-                        f'**woah there, {message.author.mention}, it seems like {member.mention} has been afk '
-                        f'for {time_inputs.human_timedelta(info["start_time"], accuracy=3, brief=True)}!**'
-                        f'\n**With reason:** {info["reason"]}\n')
-
-            if paginator.pages:
-                with contextlib.suppress(discord.HTTPException):
-                    await message.add_reaction('‼')
-
-            for page in paginator.pages:
-                await message.reply(page, allowed_mentions=discord.AllowedMentions(replied_user=True,
-                                                                                   users=False,
-                                                                                   roles=False,
-                                                                                   everyone=False),
-                                    delete_after=30)
-
-    @commands.Cog.listener('on_message')
+        pinged_afk_user_ids = list(set([u.id for u in message.mentions]).intersection(self.bot.afk.afk_users))
+        paginator = WrappedPaginator(prefix='', suffix='')
+        for user_id in pinged_afk_user_ids:
+            member = message.guild.get_member(user_id)
+            info = self.bot.afk.get(user_id)
+            if member and member.id != message.author.id and info and info.start_time:
+                paginator.add_line(
+                    f'**woah there, {message.author.mention}, it seems like {member.mention} has been afk '
+                    f'for {time_inputs.human_timedelta(info.start_time, accuracy=3, brief=True)}!**'
+                    f'\n**With reason:** {info.reason}\n')
+
+        if paginator.pages:
+            with contextlib.suppress(discord.HTTPException):
+                await message.add_reaction('‼')
+
+        for page in paginator.pages:
+            await message.reply(page, allowed_mentions=discord.AllowedMentions(replied_user=True,
+                                                                               users=False,
+                                                                               roles=False,
+                                                                               everyone=False),
+                                delete_after=30)
+
     async def on_suggestion_receive(self, message: discord.Message):
-        if message.author.bot:
-            return
-        if message.channel.id not in self.bot.suggestion_channels:
-            return
         if self.bot.suggestion_channels[message.channel.id] is True and not message.attachments and \
                 not message.channel.permissions_for(message.author).manage_messages:
             await message.delete(delay=0)
@@ -469,54 +475,72 @@ class Handler(commands.Cog, name='Handler'):
         await message.add_reaction(constants.UPVOTE)
         await message.add_reaction(constants.DOWNVOTE)
 
+    async def clear_guild_data(self, guild: discord.Guild):
+        """ Deletes everything stored for a guild in one transaction, then drops it from the caches. """
+        channel_ids = [channel.id for channel in guild.text_channels]
+        async with self.bot.db.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute('DELETE FROM suggestions WHERE channel_id = ANY($1::BIGINT[])', channel_ids)
+                # Children first, so the rows referencing prefixes are gone before it.
+                for table in GUILD_DATA_TABLES:
+                    await conn.execute(f'DELETE FROM {table} WHERE guild_id = $1', guild.id)
+
+        bot = self.bot
+        for channel_id in channel_ids:
+            bot.suggestion_channels.pop(channel_id, None)
+        bot.prefixes.pop(guild.id, None)
+        bot.prefix_matchers.pop(guild.id, None)
+        bot.welcome_channels.pop(guild.id, None)
+        bot.counting_channels.pop(guild.id, None)
+        bot.counting_rewards.pop(guild.id, None)
+        bot.message_router.invalidate()
+        bot.log_channels.pop(guild.id, None)
+        bot.guild_loggings.pop(guild.id, None)
+        if logging_cog := bot.get_cog('LoggingBackend'):
+            logging_cog.queue.drop_guild(guild.id)
+            logging_cog.audit_log.remove_guild(guild.id)
+        else:
+            bot.log_cache.pop(guild.id, None)
+        bot.message_store.remove_guild(guild.id)
+
     @commands.Cog.listener()
     async def on_guild_remove(self, guild: discord.Guild):
-        await self.bot.db.execute('DELETE FROM prefixes WHERE guild_id = $1', guild.id)
-        await self.bot.db.execute('DELETE FROM temporary_mutes WHERE guild_id = $1', guild.id)
-        for channel in guild.text_channels:
-            await self.bot.db.execute('DELETE FROM suggestions WHERE channel_id = $1', channel.id)
+        await self.clear_guild_data(guild)
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
-        await self.bot.db.execute('DELETE FROM prefixes WHERE guild_id = $1', guild.id)
-        await self.bot.db.execute('DELETE FROM temporary_mutes WHERE guild_id = $1', guild.id)
-        for channel in guild.text_channels:
-            await self.bot.db.execute('DELETE FROM suggestions WHERE channel_id = $1', channel.id)
+        await self.clear_guild_data(guild)
 
     @commands.Cog.listener()
     async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
         if channel.id in self.bot.suggestion_channels:
             await self.bot.db.execute('DELETE FROM suggestions WHERE channel_id = $1', channel.id)
 
-    @commands.Cog.listener('on_message')
     async def on_count_receive(self, message: discord.Message):
-        if message.author.bot or not message.guild or message.guild.id not in self.bot.counting_channels or \
-                message.channel.id != self.bot.counting_channels[message.guild.id]['channel']:
+        self.bot.counting.submit(message.guild.id, self.process_count, message)
+
+    async def process_count(self, message: discord.Message):
+        """ Runs in the guild's counting queue, so counts of the same guild are validated one at a time, in order. """
+        settings = self.bot.counting_channels.get(message.guild.id)
+        if not settings or message.channel.id != settings['channel']:
             return
-        if not message.content.isdigit() or message.content != str(
-                self.bot.counting_channels[message.guild.id]['number'] + 1):
-            if message.author.id == self.bot.counting_channels[message.guild.id]['last_counter']:
+        if not message.content.isdigit() or message.content != str(settings['number'] + 1):
+            if message.author.id == settings['last_counter']:
                 return await message.delete(delay=0)
-            if self.bot.counting_channels[message.guild.id]['delete_messages'] is True:
+            if settings['delete_messages'] is True:
                 return await message.delete(delay=0)
-            elif self.bot.counting_channels[message.guild.id]['reset'] is True:
-                self.bot.counting_channels[message.guild.id]['number'] = 0
+            elif settings['reset'] is True:
+                settings['number'] = 0
+                self.bot.counting.mark_dirty(message.guild.id)
                 await message.reply(f'{message.author.mention} just put the **wrong number**! Start again from **0**')
-                await self.bot.db.execute('UPDATE count_settings SET current_number = $2 WHERE guild_id = $1',
-                                          message.guild.id, 0)
                 return
-        if message.author.id == self.bot.counting_channels[message.guild.id]['last_counter']:
+        if message.author.id == settings['last_counter']:
             return await message.delete(delay=0)
-        self.bot.counting_channels[message.guild.id]['number'] += 1
-        self.bot.counting_channels[message.guild.id]['last_counter'] = message.author.id
-        self.bot.counting_channels[message.guild.id]['last_message_id'] = message.id
-        self.bot.counting_channels[message.guild.id]['messages'].append(message)
-        await self.bot.db.execute('UPDATE count_settings SET current_number = $2 WHERE guild_id = $1',
-                                  message.guild.id, self.bot.counting_channels[message.guild.id]['number'])
-        if message.guild.id not in self.bot.counting_rewards or int(message.content) not in self.bot.counting_rewards[message.guild.id]:
-            return
-        reward = await self.bot.db.fetchrow("SELECT * FROM counting WHERE (guild_id, reward_number) = ($1, $2)",
-                                            message.guild.id, self.bot.counting_channels[message.guild.id]['number'])
+        settings['number'] += 1
+        settings['last_counter'] = message.author.id
+        settings['history'].append(message.id, message.author.id, settings['number'])
+        self.bot.counting.mark_dirty(message.guild.id)
+        reward = self.bot.counting_rewards.get(message.guild.id, {}).get(settings['number'])
         if not reward:
             return
         msg = reward['reward_message']
@@ -546,44 +570,37 @@ class Handler(commands.Cog, name='Handler'):
 
     @commands.Cog.listener('on_raw_message_delete')
     async def on_counting_message_delete(self, payload: discord.RawMessageDeleteEvent):
-        if not payload.guild_id or payload.guild_id not in self.bot.counting_channels:
-            return
-        if payload.message_id == self.bot.counting_channels[payload.guild_id]['last_message_id']:
-            self.bot.counting_channels[payload.guild_id]['messages'].pop()
-            self.bot.counting_channels[payload.guild_id]['number'] -= 1
-            try:
-                message = self.bot.counting_channels[payload.guild_id]['messages'][-1]
-                self.bot.counting_channels[payload.guild_id]['number'] = int(message.content)
-                self.bot.counting_channels[payload.guild_id]['last_message_id'] = message.id
-                self.bot.counting_channels[payload.guild_id]['last_counter'] = message.author.id
-            except (KeyError, IndexError):
-                self.bot.counting_channels[payload.guild_id]['last_message_id'] = None
-                self.bot.counting_channels[payload.guild_id]['last_counter'] = None
-            await self.bot.db.execute('UPDATE count_settings SET current_number = $2 WHERE guild_id = $1',
-                                      payload.guild_id, self.bot.counting_channels[payload.guild_id]['number'])
-        else:
-            try:
-                message = [m for m in list(self.bot.counting_channels[payload.guild_id]['messages']) if
-                           m.id == payload.message_id][0]
-                self.bot.counting_channels[payload.guild_id]['messages'].remove(message)
-            except (KeyError, IndexError):
-                pass
+        if payload.guild_id and payload.guild_id in self.bot.counting_channels:
+            self.bot.counting.submit(payload.guild_id, self.process_count_delete, payload)
 
         if payload.message_id in self.bot.saved_messages:
             m = self.bot.saved_messages.pop(payload.message_id)
             await m.delete(delay=0)
 
-    @commands.Cog.listener('on_message')
-    async def emoji_sender(self, message: discord.Message):
-        if not await self.bot.is_owner(message.author) or self.bot.user.id != 788278464474120202:
+    async def process_count_delete(self, payload: discord.RawMessageDeleteEvent):
+        settings = self.bot.counting_channels.get(payload.guild_id)
+        if not settings:
+            return
+        history = settings['history']
+        last = history.last
+        if not last or last[0] != payload.message_id:
+            history.remove(payload.message_id)
             return
+        history.remove(payload.message_id)
+        settings['number'] -= 1
+        previous = history.last
+        if previous:
+            _, settings['last_counter'], settings['number'] = previous
+        else:
+            settings['last_counter'] = None
+        self.bot.counting.mark_dirty(payload.guild_id)
+
+    async def emoji_sender(self, message: discord.Message):
         ic = '\u200b'
         content = message.content
         emojis = re.findall(r';(?P<name>[a-zA-Z0-9]{1,32}?);', message.content)
         for em_name in emojis:
-            emoji = discord.utils.find(lambda em: em.name.lower() == em_name.lower(), self.bot.emojis)
-            if not emoji or not emoji.is_usable():
-                emoji = None
+            emoji = self.bot.emoji_index.get(em_name, usable_only=True)
             content = content.replace(f';{em_name};', f'{str(emoji or f";{ic}{em_name}{ic};")}', 1)
         if content.replace(ic, '') != message.content:
             await message.channel.send(content)
@@ -653,15 +670,96 @@ class Handler(commands.Cog, name='Handler'):
             self.bot.add_view(WelcomeView())
             self.bot.welcome_button_added = True
 
-    @tasks.loop(minutes=1)
-    async def delete_old_records(self):
-        await self.bot.db.execute("DELETE FROM commands WHERE timestamp < now() - interval '30 days'")
+    @staticmethod
+    async def create_command_partition(conn, day: datetime.date, *, parent: str = 'commands'):
+        await conn.execute(f"CREATE TABLE IF NOT EXISTS commands_{day:%Y%m%d} PARTITION OF {parent} "
+                           f"FOR VALUES FROM ('{day}') TO ('{day + datetime.timedelta(days=1)}')")
+
+    async def partition_commands_table(self):
+        """
+        Migrates a plain commands table into daily partitions, keeping the retained rows.
+        This is run on purpose with `dev partition-commands`, never automatically.
+        """
+        today = discord.utils.utcnow().date()
+        cutoff = today - datetime.timedelta(days=COMMAND_RETENTION_DAYS)
+        async with self.bot.db.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute('LOCK TABLE commands IN ACCESS EXCLUSIVE MODE')
+                # Unique indexes can't be copied to a table partitioned by timestamp, so indexes are recreated by hand.
+                await conn.execute('CREATE TABLE commands_partitioned (LIKE commands INCLUDING ALL EXCLUDING INDEXES) '
+                                   'PARTITION BY RANGE (timestamp)')
+                await conn.execute('CREATE INDEX ON commands_partitioned (guild_id, user_id)')
+                for days in range(-COMMAND_RETENTION_DAYS, COMMAND_PARTITIONS_AHEAD + 1):
+                    await self.create_command_partition(conn, today + datetime.timedelta(days=days),
+                                                        parent='commands_partitioned')
+                # Rows outside the daily partitions, if any, land here instead of failing the copy.
+                await conn.execute('CREATE TABLE commands_default PARTITION OF commands_partitioned DEFAULT')
+                await conn.execute('INSERT INTO commands_partitioned OVERRIDING SYSTEM VALUE '
+                                   'SELECT * FROM commands WHERE timestamp >= $1 OR timestamp IS NULL', cutoff)
+
+                # Serial sequences are owned by the old table and would be dropped with it; identity
+                # columns get a new sequence from INCLUDING ALL, which has to continue where the old one was.
+                columns = await conn.fetch("SELECT attname, attidentity FROM pg_attribute WHERE attrelid = 'commands'::regclass "
+                                           "AND attnum > 0 AND NOT attisdropped")
+                for column in columns:
+                    sequence = await conn.fetchval('SELECT pg_get_serial_sequence($1, $2)', 'commands', column['attname'])
+                    if not sequence:
+                        continue
+                    if column['attidentity']:
+                        last_value = await conn.fetchval(f'SELECT last_value FROM {sequence}')
+                        await conn.execute('SELECT setval(pg_get_serial_sequence($1, $2), $3)',
+                                           'commands_partitioned', column['attname'], last_value)
+                    else:
+                        await conn.execute(f'ALTER SEQUENCE {sequence} OWNED BY commands_partitioned."{column["attname"]}"')
+
+                await conn.execute('DROP TABLE commands')
+                await conn.execute('ALTER TABLE commands_partitioned RENAME TO commands')
+        logging.info('Migrated the commands table to daily partitions')
+
+    async def commands_table_is_partitioned(self) -> bool:
+        return await self.bot.db.fetchval(
+            "SELECT EXISTS(SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = 'commands')")
+
+    @tasks.loop(hours=1)
+    async def manage_command_partitions(self):
+        today = discord.utils.utcnow().date()
+        cutoff = today - datetime.timedelta(days=COMMAND_RETENTION_DAYS)
+        if not await self.commands_table_is_partitioned():
+            # Until `dev partition-commands` is run, retention is a plain DELETE.
+            await self.bot.db.execute('DELETE FROM commands WHERE timestamp < $1', cutoff)
+        else:
+            # Retention drops whole daily partitions instead of running a DELETE over the whole table.
+            async with self.bot.db.acquire() as conn:
+                for days in range(COMMAND_PARTITIONS_AHEAD + 1):
+                    await self.create_command_partition(conn, today + datetime.timedelta(days=days))
+
+                partitions = await conn.fetch("SELECT c.relname FROM pg_inherits i "
+                                              "JOIN pg_class c ON c.oid = i.inhrelid "
+                                              "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'commands'")
+                for (name,) in partitions:
+                    try:
+                        day = datetime.datetime.strptime(name, 'commands_%Y%m%d').date()
+                    except ValueError:
+                        continue
+                    if day < cutoff:
+                        await conn.execute(f'DROP TABLE {name}')
+                await conn.execute('DELETE FROM commands_default WHERE timestamp < $1', cutoff)
+
+        # Keep the stats rollups in line with the raw rows that are still retained.
+        async with self.bot.db.acquire() as conn:
+            if await conn.fetchval("SELECT to_regclass('command_user_stats_daily') IS NOT NULL"):
+                await conn.execute('DELETE FROM command_stats_daily WHERE day < $1', cutoff)
+                await conn.execute('DELETE FROM command_user_stats_daily WHERE day < $1', cutoff)
+
+    @manage_command_partitions.before_loop
+    async def before_manage_command_partitions(self):
+        await self.bot.wait_until_ready()
 
     @commands.Cog.listener('on_command')
     async def on_command(self, ctx: CustomContext):
-        await self.bot.db.execute(
-            "INSERT INTO commands (guild_id, user_id, command, timestamp) VALUES ($1, $2, $3, $4)",
-            getattr(ctx.guild, 'id', None), ctx.author.id, ctx.command.qualified_name, ctx.message.created_at)
+        self.bot.command_usage.record(getattr(ctx.guild, 'id', None), ctx.author.id,
+                                      ctx.command.qualified_name, ctx.message.created_at)
 
         bucket = self.bot.global_mapping.get_bucket(ctx.message)
         current = ctx.message.created_at.timestamp()
@@ -29,22 +29,25 @@ import operator
 import random
 import time
 from types import SimpleNamespace
-from typing import Dict, Optional
-from collections import deque
+from typing import Dict, List, Optional
 
 import asyncpg.exceptions
 import discord
 import tabulate
-from discord.ext import commands, tasks
+from discord.ext import commands
 
 from DuckBot import errors
 from DuckBot.__main__ import DuckBot, CustomContext
 from DuckBot.cogs.management import UnicodeEmoji
+from DuckBot.helpers.counting import CountHistory
+from DuckBot.helpers.expiry_scheduler import ExpiryScheduler
 from DuckBot.helpers.helper import LoggingEventsFlags
+from DuckBot.helpers.log_routing import GuildLogRoutes
 
 default_message = "**{inviter}** just added **{user}** to **{server}** (They're the **{count}** to join)"
 
-POLL_PERIOD = 25
+# Invites are fetched at most once every this many seconds per guild to attribute joins.
+JOIN_FETCH_INTERVAL = 2.0
 
 
 def setup(bot: commands.Bot):
@@ -130,7 +133,7 @@ class ChannelsView(discord.ui.View):
                     await self.bot.db.execute(
                         'UPDATE log_channels SET default_channel = $2, default_chid = $3 WHERE guild_id = $1',
                         self.ctx.guild.id, webhook_url, channel.id)
-                    self.bot.update_log('default', webhook_url, message.guild.id)
+                    self.bot.update_log('default', webhook_url, message.guild.id, channel.id)
                 except commands.ChannelNotFound:
                     pass
                 except (commands.BadArgument, discord.Forbidden):
@@ -185,7 +188,7 @@ class ChannelsView(discord.ui.View):
                     await self.bot.db.execute(
                         'UPDATE log_channels SET message_channel = $2, message_chid = $3 WHERE guild_id = $1',
                         self.ctx.guild.id, webhook_url, channel.id)
-                    self.bot.update_log('message', webhook_url, message.guild.id)
+                    self.bot.update_log('message', webhook_url, message.guild.id, channel.id)
                 except commands.ChannelNotFound:
                     pass
                 except (commands.BadArgument, discord.Forbidden):
@@ -240,7 +243,7 @@ class ChannelsView(discord.ui.View):
                     await self.bot.db.execute(
                         'UPDATE log_channels SET join_leave_channel = $2, join_leave_chid = $3 WHERE guild_id = $1',
                         self.ctx.guild.id, webhook_url, channel.id)
-                    self.bot.update_log('join_leave', webhook_url, message.guild.id)
+                    self.bot.update_log('join_leave', webhook_url, message.guild.id, channel.id)
                 except commands.ChannelNotFound:
                     pass
                 except (commands.BadArgument, discord.Forbidden):
@@ -296,7 +299,7 @@ class ChannelsView(discord.ui.View):
                     await self.bot.db.execute(
                         'UPDATE log_channels SET member_channel = $2, member_chid = $3 WHERE guild_id = $1',
                         self.ctx.guild.id, webhook_url, channel.id)
-                    self.bot.update_log('member', webhook_url, message.guild.id)
+                    self.bot.update_log('member', webhook_url, message.guild.id, channel.id)
                 except commands.ChannelNotFound:
                     pass
                 except (commands.BadArgument, discord.Forbidden):
@@ -351,7 +354,7 @@ class ChannelsView(discord.ui.View):
                     await self.bot.db.execute(
                         'UPDATE log_channels SET server_channel = $2, server_chid = $3 WHERE guild_id = $1',
                         self.ctx.guild.id, webhook_url, channel.id)
-                    self.bot.update_log('server', webhook_url, message.guild.id)
+                    self.bot.update_log('server', webhook_url, message.guild.id, channel.id)
                 except commands.ChannelNotFound:
                     pass
                 except (commands.BadArgument, discord.Forbidden):
@@ -407,7 +410,7 @@ class ChannelsView(discord.ui.View):
                     await self.bot.db.execute(
                         'UPDATE log_channels SET voice_channel = $2, voice_chid = $3 WHERE guild_id = $1',
                         self.ctx.guild.id, webhook_url, channel.id)
-                    self.bot.update_log('voice', webhook_url, message.guild.id)
+                    self.bot.update_log('voice', webhook_url, message.guild.id, channel.id)
                 except commands.ChannelNotFound:
                     pass
                 except (commands.BadArgument, discord.Forbidden):
@@ -508,7 +511,10 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
     def __init__(self, bot: commands.Bot):
         self.bot: DuckBot = bot
         self._invites_ready = asyncio.Event()
-        self._dict_filled = asyncio.Event()
+        self.invite_expiry = ExpiryScheduler(self.expire_invite)
+        self._pending_joins: Dict[int, List[discord.Member]] = {}
+        self._last_join_fetch: Dict[int, float] = {}
+        self._join_locks: Dict[int, asyncio.Lock] = {}
 
         self.select_emoji = '⚙'
         self.select_brief = 'Manage Bot Settings, Like Prefix, Logs, etc.'
@@ -525,113 +531,66 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
 
         for guild in self.bot.guilds:
             fetched = await self.fetch_invites(guild)
-            invites = self.bot.invites[guild.id] = fetched or {}
+            invites = self.cache_invites(guild, fetched or {})
 
             if "VANITY_URL" in guild.features:
                 with contextlib.suppress(discord.HTTPException):
                     vanity = await guild.vanity_invite()
                     invites["VANITY"] = invites[vanity.code] = vanity
-        self.update_invite_expiry.start()
-        self.delete_expired.start()
+        self.invite_expiry.start()
+        self._invites_ready.set()
 
     def cog_unload(self):
-        self.update_invite_expiry.cancel()
-        self.delete_expired.cancel()
+        self.invite_expiry.close()
 
     async def update_rewards(self, *, guild: discord.Guild, reward_number: int, message: str = None,
                              role: discord.Role = None, reaction: str = None):
         if not any([message, role, reaction]):
             await self.bot.db.execute("DELETE FROM counting WHERE (guild_id, reward_number) = ($1, $2)", guild.id,
                                       reward_number)
-            try:
-                self.bot.counting_rewards[guild.id].remove(reward_number)
-            except KeyError:
-                pass
+            self.bot.counting_rewards.get(guild.id, {}).pop(reward_number, None)
             return reward_number
         await self.bot.db.execute('INSERT INTO counting (guild_id, reward_number, reward_message, '
                                   'role_to_grant, reaction_to_add) VALUES ($1, $2, $3, $4, $5) '
                                   'ON CONFLICT (guild_id, reward_number) DO UPDATE SET '
                                   'reward_message = $3, role_to_grant = $4, reaction_to_add = $5',
                                   guild.id, reward_number, message, getattr(role, 'id', None), reaction)
-        try:
-            self.bot.counting_rewards[guild.id].add(reward_number)
-        except KeyError:
-            self.bot.counting_rewards[guild.id] = {reward_number}
+        self.bot.counting_rewards.setdefault(guild.id, {})[reward_number] = {
+            'reward_message': message, 'role_to_grant': getattr(role, 'id', None), 'reaction_to_add': reaction}
         return reward_number
 
-    @tasks.loop()
-    async def delete_expired(self):
-        if not self.bot.expiring_invites:
-            await self._dict_filled.wait()
-        invites = self.bot.expiring_invites
-        expiry_time = min(invites.keys())
-        inv = invites[expiry_time]
-        sleep_time = expiry_time - (int(time.time()) - self.bot.last_update)
-        self.bot.shortest_invite = expiry_time
-        await asyncio.sleep(sleep_time)
-        # delete invite from cache
-        self.delete_invite(inv)
-        # delete invite from expiring invite list
-        # bot.shortest_invite is updated in update_invite_expiry
-        # and since the expiring_invites dict is also updated
-        # so the time goes down we use this instead
-        self.bot.expiring_invites.pop(self.bot.shortest_invite, None)
-
-    @delete_expired.before_loop
-    async def wait_for_list(self):
-        await self.wait_for_invites()
-
-    @tasks.loop(minutes=POLL_PERIOD)
-    async def update_invite_expiry(self):
-        # flatten all the invites in the cache into one single list
-        flattened = [invite for inner in self.bot.invites.values() for invite in inner.values()]
-        # get current posix time
-        current = time.time()
-        self.bot.expiring_invites = {
-            inv.max_age - int(current - inv.created_at.replace(tzinfo=datetime.timezone.utc).timestamp()): inv
-            for inv in flattened if inv.max_age != 0}
-
-        exists = True
-
-        # update self.bot.shortest_invite
-        # so we can compare it with invites
-        # that were just created
-        try:  # self.bot.shortest_invite might not exist
-            self.bot.shortest_invite = self.bot.shortest_invite - int(time.time() - self.bot.last_update)
-        except AttributeError:
-            exists = False
-
-        if self.update_invite_expiry.current_loop == 0:
-            # this needs to be updated before
-            # setting self._invites_ready
-            self.bot.last_update = int(current)
-            self._invites_ready.set()
-        # we need to check that expiring_invites
-        # is truthy otherwise this conditional will
-        # raise an error because we passed an
-        # empty sequence to min()
-        elif exists and self.bot.expiring_invites and self.bot.shortest_invite > min(self.bot.expiring_invites.keys()):
-            # this conditional needs to run before we
-            # update self._last_update
-            self.delete_expired.restart()
-            self.bot.last_update = int(current)
-        else:
-            # the last update needs to be updated regardless or
-            # it will cause updates getting deleted from the cache
-            # too early because the expiring_invites list will be
-            # updated with new times but delete_expired will think
-            # that the last update was ages ago and will deduct a huge
-            # amount of seconds from the expiry time to form the sleep_time
-            self.bot.last_update = int(current)
-        # set the event so if the delete_expired
-        # task is cancelled it will start again
-        if self.bot.expiring_invites:
-            self._dict_filled.set()
-            self._dict_filled.clear()
+    @staticmethod
+    def invite_expires_at(invite: discord.Invite) -> Optional[float]:
+        if not invite.max_age or not invite.created_at:
+            return None
+        return invite.created_at.replace(tzinfo=datetime.timezone.utc).timestamp() + invite.max_age
+
+    def schedule_expiry(self, guild_id: int, invite: discord.Invite) -> None:
+        expires_at = self.invite_expires_at(invite)
+        if expires_at:
+            self.invite_expiry.schedule((guild_id, invite.code), expires_at)
+
+    def cache_invites(self, guild: discord.Guild, invites: Dict[str, discord.Invite]) -> Dict[str, discord.Invite]:
+        """ Replaces the guild's cached invites, and schedules their expiry. """
+        self.bot.invites[guild.id] = invites
+        for invite in invites.values():
+            self.schedule_expiry(guild.id, invite)
+        return invites
+
+    def expire_invite(self, key) -> None:
+        guild_id, code = key
+        invites = self.bot.invites.get(guild_id) or {}
+        invite = invites.get(code)
+        # the expiry of invites that were replaced or removed
+        # from the cache is not cancelled, so check it's still due
+        if invite and (self.invite_expires_at(invite) or float('inf')) <= time.time():
+            invites.pop(code)
 
     def delete_invite(self, invite: discord.Invite) -> None:
         entry_found = self.get_invites(invite.guild.id)
-        entry_found.pop(invite.code, None)
+        if entry_found:
+            entry_found.pop(invite.code, None)
+        self.invite_expiry.cancel((invite.guild.id, invite.code))
 
     def get_invite(self, code: str) -> Optional[discord.Invite]:
         for invites in self.bot.invites.values():
@@ -674,6 +633,7 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
         cached = self.bot.invites.get(invite.guild.id, None)
         if cached:
             cached[invite.code] = invite
+            self.schedule_expiry(invite.guild.id, invite)
 
     @commands.Cog.listener()
     async def on_invite_delete(self, invite: discord.Invite) -> None:
@@ -691,21 +651,20 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild) -> None:
-        invites = await self.fetch_invites(guild) or {}
-        self.bot.invites[guild.id] = invites
+        self.cache_invites(guild, await self.fetch_invites(guild) or {})
 
     @commands.Cog.listener()
     async def on_guild_available(self, guild: discord.Guild) -> None:
         # reload all invites in case they changed during
         # the time that the guilds were unavailable
-        self.bot.invites[guild.id] = await self.fetch_invites(guild) or {}
+        self.cache_invites(guild, await self.fetch_invites(guild) or {})
 
     @commands.Cog.listener()
     async def on_member_update(self, before: discord.Member, after: discord.Member) -> None:
         if before.id != self.bot.user.id:
             return
         if not before.guild_permissions.manage_channels and after.guild_permissions.manage_channels:
-            self.bot.invites[before.guild.id] = await self.fetch_invites(before.guild) or {}
+            self.cache_invites(before.guild, await self.fetch_invites(before.guild) or {})
         if before.guild_permissions.manage_guild and not after.guild_permissions.manage_guild:
             self.bot.invites.pop(before.guild.id, None)
 
@@ -715,26 +674,68 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
 
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member) -> None:
-        invites = await self.fetch_invites(member.guild)
-        dispatched: bool = False
-        if invites:
-            # we sort the invites to ensure we are comparing
-            # A.uses == A.uses
-            invites = sorted(invites.values(), key=lambda i: i.code)
-            cached = sorted(self.bot.invites[member.guild.id].values(),
-                            key=lambda i: i.code)
-
-            # zipping is the easiest way to compare each in order, and
-            # they should be the same size? if we do it properly
-            for old, new in zip(cached, invites):
-                if old.uses < new.uses:
-                    self.bot.invites[member.guild.id][old.code] = new
-                    self.bot.dispatch("invite_update", member, new)
-                    dispatched = True
-                    break
-
-        if dispatched is False:
-            self.bot.dispatch("invite_update", member, None)
+        # joins are attributed in batches, so a raid costs one
+        # invites() call every JOIN_FETCH_INTERVAL seconds
+        pending = self._pending_joins.get(member.guild.id)
+        if pending is not None:
+            pending.append(member)
+            return
+        self._pending_joins[member.guild.id] = [member]
+        self.bot.loop.create_task(self._attribute_joins(member.guild))
+
+    async def _attribute_joins(self, guild: discord.Guild) -> None:
+        # a fetch that outlasts the interval must finish updating the cached
+        # uses before the next one compares against them
+        lock = self._join_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            try:
+                await self._attribute_join_batch(guild)
+            finally:
+                # the next batch's task is waiting for this lock if it has joins pending
+                if guild.id not in self._pending_joins:
+                    self._join_locks.pop(guild.id, None)
+
+    async def _attribute_join_batch(self, guild: discord.Guild) -> None:
+        wait = self._last_join_fetch.get(guild.id, 0) + JOIN_FETCH_INTERVAL - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_join_fetch[guild.id] = time.monotonic()
+        members = self._pending_joins.pop(guild.id)
+        invites = await self.fetch_invites(guild)
+        used = None
+        if invites is not None:
+            cached = self.bot.invites.setdefault(guild.id, {})
+            uses = self.diff_invite_uses(cached, invites)
+            # with a single invite used as often as members joined, all of them
+            # came through it. if several invites were used, or fewer uses than
+            # joins were counted, we can't tell who used which, so none is given
+            if len(uses) == 1:
+                code, count = uses.popitem()
+                if count >= len(members):
+                    used = invites.get(code) or cached.get(code)
+            for code in [code for code, invite in cached.items() if code not in invites and invite.max_uses]:
+                cached.pop(code)
+            cached.update(invites)
+            for invite in invites.values():
+                self.schedule_expiry(guild.id, invite)
+
+        for member in members:
+            self.bot.dispatch("invite_update", member, used)
+
+    @staticmethod
+    def diff_invite_uses(cached: Dict[str, discord.Invite], invites: Dict[str, discord.Invite]) -> Dict[str, int]:
+        """ How many times each invite was used between the cached and the fetched invites. """
+        uses = {}
+        for code, new in invites.items():
+            old = cached.get(code)
+            count = new.uses - (old.uses if old else 0)
+            if count > 0:
+                uses[code] = count
+        # an invite that reached its max uses is deleted, so it's missing from the fetched invites
+        for code, old in cached.items():
+            if code not in invites and old.max_uses and old.uses + 1 >= old.max_uses:
+                uses[code] = old.max_uses - old.uses
+        return uses
 
     # if you want to use this command you
     # might want to make a error handler
@@ -976,6 +977,7 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
         **Note:** If image-only is set to `yes`, the bot will delete all messages without attachments, and warn the user.
         """
         self.bot.suggestion_channels[channel.id] = image_only
+        self.bot.message_router.invalidate()
         await self.bot.db.execute('INSERT INTO suggestions (channel_id, image_only) VALUES ($1, $2) ON CONFLICT '
                                   '(channel_id) DO UPDATE SET image_only = $2', channel.id, image_only)
         await ctx.send(f'💞 | **Enabled** suggestions mode for {channel.mention}'
@@ -990,6 +992,7 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
         """
         try:
             self.bot.suggestion_channels.pop(channel.id)
+            self.bot.message_router.invalidate()
         except KeyError:
             pass
         await self.bot.db.execute('DELETE FROM suggestions WHERE channel_id = $1', channel.id)
@@ -1081,7 +1084,7 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
         """Adds a prefix to the bots prefixes.\nuse quotes to add spaces: %PRE%prefix \"duck \" """
         try:
             await self.bot.db.execute("INSERT INTO pre(guild_id, prefix) VALUES ($1, $2)", ctx.guild.id, new)
-            self.bot.prefixes[ctx.guild.id] = await self.bot.fetch_prefixes(ctx.message)
+            self.bot.update_prefixes(ctx.guild.id, await self.bot.fetch_prefixes(ctx.message))
             await ctx.send(f'✅ **|** Added `{new}` to my prefixes!')
         except asyncpg.exceptions.UniqueViolationError:
             return await ctx.send('⚠ **|** That is already one of my prefixes!')
@@ -1098,14 +1101,14 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
         else:
             await ctx.send('⚠ **|** That is not one of my prefixes!')
         await self.bot.db.execute('DELETE FROM pre WHERE (guild_id, prefix) = ($1, $2)', ctx.guild.id, prefix)
-        self.bot.prefixes[ctx.guild.id] = await self.bot.fetch_prefixes(ctx.message)
+        self.bot.update_prefixes(ctx.guild.id, await self.bot.fetch_prefixes(ctx.message))
 
     @commands.check_any(commands.has_permissions(manage_guild=True), commands.is_owner())
     @prefix.command(name="clear", aliases=['delall'])
     async def prefixes_clear(self, ctx):
         """ Clears the bots prefixes, resetting it to default. """
         await self.bot.db.execute("DELETE FROM pre WHERE guild_id = $1", ctx.guild.id)
-        self.bot.prefixes[ctx.guild.id] = self.bot.PRE
+        self.bot.update_prefixes(ctx.guild.id, self.bot.PRE)
         return await ctx.send("✅ **|** Cleared prefixes!")
 
     # Add mute role
@@ -1338,8 +1341,8 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
                                                         'last_counter': None,
                                                         'delete_messages': True,
                                                         'reset': False,
-                                                        'last_message_id': None,
-                                                        'messages': deque(maxlen=100)}
+                                                        'history': CountHistory()}
+            self.bot.message_router.invalidate()
             await ctx.send(f'✅ **|** Set the **counting channel** to {channel.mention}')
         except asyncpg.UniqueViolationError:
             if (ctx.guild.id in self.bot.counting_channels and self.bot.counting_channels[ctx.guild.id][
@@ -1358,12 +1361,12 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
                         self.bot.counting_channels[ctx.guild.id]['channel'] = channel.id
                         self.bot.counting_channels[ctx.guild.id]['number'] = 0
                         self.bot.counting_channels[ctx.guild.id]['last_counter'] = None
-                        self.bot.counting_channels[ctx.guild.id]['messages'] = deque(maxlen=100)
+                        self.bot.counting_channels[ctx.guild.id]['history'] = CountHistory()
                     except KeyError:
                         self.bot.counting_channels[ctx.guild.id] = {'channel': channel.id, 'number': 0,
                                                                     'last_counter': None, 'delete_messages': True,
-                                                                    'reset': False, 'last_message_id': None,
-                                                                    'messages': deque(maxlen=100)}
+                                                                    'reset': False, 'history': CountHistory()}
+                        self.bot.message_router.invalidate()
                     await confirm[1].edit(
                         content='✅ **|** Updated the **counting channel** and reset the current number to **0**',
                         view=None)
@@ -1382,6 +1385,7 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
                                         return_message=True)
             if confirm[0] is True:
                 self.bot.counting_channels.pop(ctx.guild.id)
+                self.bot.message_router.invalidate()
                 await self.bot.db.execute('DELETE FROM count_settings WHERE guild_id = $1', ctx.guild.id)
                 await confirm[1].edit(content='✅ **|** **Unset** this server\'s **counting channel**!', view=None)
             else:
@@ -1472,10 +1476,7 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
             if confirm[0] is False:
                 return await confirm[1].edit(content='❌ **|** Cancelled!', view=None)
 
-            try:
-                self.bot.counting_rewards[ctx.guild.id].remove(number)
-            except KeyError:
-                pass
+            self.bot.counting_rewards[ctx.guild.id].pop(number, None)
             await self.bot.db.execute('DELETE FROM counting WHERE (guild_id, reward_number) = ($1, $2)', ctx.guild.id,
                                       number)
         else:
@@ -1586,11 +1587,7 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
         await self.bot.db.execute("INSERT INTO logging_events(guild_id) VALUES ($1) ON CONFLICT (guild_id) DO NOTHING",
                                   ctx.guild.id)
         self.bot.guild_loggings[ctx.guild.id] = LoggingEventsFlags.all()
-        try:
-            self.bot.log_channels[ctx.guild.id]._replace(default=webhook_url)
-        except KeyError:
-            self.bot.log_channels[ctx.guild.id] = self.bot.log_webhooks(default=webhook_url, voice=None, message=None,
-                                                                        member=None, server=None, join_leave=None)
+        self.bot.log_channels.setdefault(ctx.guild.id, GuildLogRoutes()).update('default', webhook_url, channel.id)
         await ctx.send(f'Successfully set the logging channel to {channel.mention}'
                        f'\n_see `{ctx.clean_prefix}help log` for more customization commands!_')
 
@@ -1611,6 +1608,9 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
                 self.bot.log_channels.pop(ctx.guild.id)
             except KeyError:
                 pass
+            self.bot.message_store.remove_guild(ctx.guild.id)
+            if logging_cog := self.bot.get_cog('LoggingBackend'):
+                logging_cog.queue.drop_guild(ctx.guild.id)
             channels = await self.bot.db.fetchrow('DELETE FROM log_channels WHERE guild_id = $1 RETURNING *',
                                                   ctx.guild.id)
 
@@ -1823,12 +1823,13 @@ class GuildSettings(commands.Cog, name='Guild Settings'):
                 member_webhook = await member_channel.create_webhook(name='DuckBot logging', avatar=avatar)
                 server_channel = await cat.create_text_channel(name='server-log')
                 server_webhook = await server_channel.create_webhook(name='DuckBot logging', avatar=avatar)
-                self.bot.log_channels[ctx.guild.id] = self.bot.log_webhooks(join_leave=join_leave_webhook.url,
-                                                                            server=server_webhook.url,
-                                                                            default=server_webhook.url,
-                                                                            message=message_webhook.url,
-                                                                            member=member_webhook.url,
-                                                                            voice=voice_webhook.url)
+                self.bot.log_channels[ctx.guild.id] = GuildLogRoutes(
+                    join_leave=(join_leave_channel.id, join_leave_webhook.url),
+                    server=(server_channel.id, server_webhook.url),
+                    default=(server_channel.id, server_webhook.url),
+                    message=(message_channel.id, message_webhook.url),
+                    member=(member_channel.id, member_webhook.url),
+                    voice=(voice_channel.id, voice_webhook.url))
                 self.bot.guild_loggings[ctx.guild.id] = LoggingEventsFlags.all()
                 await self.bot.db.execute('INSERT INTO prefixes (guild_id) VALUES ($1) '
                                           'ON CONFLICT (guild_id) DO NOTHING', ctx.guild.id)
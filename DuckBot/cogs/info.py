@@ -878,7 +878,17 @@ DuckBot's top role position
     # https://github.com/Rapptz/RoboDanny
     # https://github.com/Rapptz/RoboDanny/blob/rewrite/cogs/stats.py#L426-L435
     @staticmethod
-    async def show_guild_stats(ctx):
+    async def fetch_stats(ctx, query: str, *args) -> typing.Dict[str, list]:
+        # All-time numbers come from the daily rollups, "today" from the last day of raw rows.
+        stats = {'total': [], 'commands': [], 'commands_today': [], 'users': [], 'users_today': []}
+        for kind, name, uses, first_used in await ctx.bot.db.fetch(query, *args):
+            stats[kind].append((name, uses, first_used))
+        for records in stats.values():
+            records.sort(key=lambda r: r[1] or 0, reverse=True)
+        return stats
+
+    @classmethod
+    async def show_guild_stats(cls, ctx):
         lookup = (
             '\N{FIRST PLACE MEDAL}',
             '\N{SECOND PLACE MEDAL}',
@@ -887,70 +897,53 @@ DuckBot's top role position
             '\N{SPORTS MEDAL}'
         )
         embed = discord.Embed(title='Server Command Stats', colour=discord.Colour.blurple())
+        query = """WITH top_commands AS (
+                       SELECT command, SUM(uses) AS uses FROM command_stats_daily WHERE guild_id=$1
+                       GROUP BY command ORDER BY uses DESC LIMIT 5
+                   ), top_commands_today AS (
+                       SELECT command, COUNT(*) AS uses FROM commands
+                       WHERE guild_id=$1 AND timestamp > (CURRENT_TIMESTAMP - INTERVAL '1 day')
+                       GROUP BY command ORDER BY uses DESC LIMIT 5
+                   ), top_users AS (
+                       SELECT user_id, SUM(uses) AS uses FROM command_user_stats_daily WHERE guild_id=$1
+                       GROUP BY user_id ORDER BY uses DESC LIMIT 5
+                   ), top_users_today AS (
+                       SELECT user_id, COUNT(*) AS uses FROM commands
+                       WHERE guild_id=$1 AND timestamp > (CURRENT_TIMESTAMP - INTERVAL '1 day')
+                       GROUP BY user_id ORDER BY uses DESC LIMIT 5
+                   )
+                   SELECT 'total', NULL, COALESCE(SUM(uses), 0), MIN(first_used) FROM command_stats_daily WHERE guild_id=$1
+                   UNION ALL SELECT 'commands', command, uses, NULL FROM top_commands
+                   UNION ALL SELECT 'commands_today', command, uses, NULL FROM top_commands_today
+                   UNION ALL SELECT 'users', user_id::text, uses, NULL FROM top_users
+                   UNION ALL SELECT 'users_today', user_id::text, uses, NULL FROM top_users_today;
+                """
+        stats = await cls.fetch_stats(ctx, query, ctx.guild.id)
         # total command uses
-        query = "SELECT COUNT(*), MIN(timestamp) FROM commands WHERE guild_id=$1;"
-        count = await ctx.bot.db.fetchrow(query, ctx.guild.id)
-        embed.description = f'{count[0]} commands used.'
-        if count[1]:
-            timestamp = count[1].replace(tzinfo=datetime.timezone.utc)
+        _, uses, first_used = stats['total'][0]
+        embed.description = f'{uses} commands used.'
+        if first_used:
+            timestamp = first_used.replace(tzinfo=datetime.timezone.utc)
         else:
             timestamp = discord.utils.utcnow()
         embed.set_footer(text='Tracking command usage since').timestamp = timestamp
-        query = """SELECT command,
-                          COUNT(*) as "uses"
-                   FROM commands
-                   WHERE guild_id=$1
-                   GROUP BY command
-                   ORDER BY "uses" DESC
-                   LIMIT 5;
-                """
-        records = await ctx.bot.db.fetch(query, ctx.guild.id)
         value = '\n'.join(f'{lookup[index]}: {command} ({uses} uses)'
-                          for (index, (command, uses)) in enumerate(records)) or 'No Commands'
+                          for (index, (command, uses, _)) in enumerate(stats['commands'])) or 'No Commands'
         embed.add_field(name='Top Commands', value=value, inline=True)
-        query = """SELECT command,
-                          COUNT(*) as "uses"
-                   FROM commands
-                   WHERE guild_id=$1
-                   AND timestamp > (CURRENT_TIMESTAMP - INTERVAL '1 day')
-                   GROUP BY command
-                   ORDER BY "uses" DESC
-                   LIMIT 5;
-                """
-        records = await ctx.bot.db.fetch(query, ctx.guild.id)
         value = '\n'.join(f'{lookup[index]}: {command} ({uses} uses)'
-                          for (index, (command, uses)) in enumerate(records)) or 'No Commands.'
+                          for (index, (command, uses, _)) in enumerate(stats['commands_today'])) or 'No Commands.'
         embed.add_field(name='Top Commands Today', value=value, inline=True)
         embed.add_field(name='\u200b', value='\u200b', inline=True)
-        query = """SELECT user_id,
-                          COUNT(*) AS "uses"
-                   FROM commands
-                   WHERE guild_id=$1
-                   GROUP BY user_id
-                   ORDER BY "uses" DESC
-                   LIMIT 5;
-                """
-        records = await ctx.bot.db.fetch(query, ctx.guild.id)
         value = '\n'.join(f'{lookup[index]}: <@!{author_id}> ({uses} bot uses)'
-                          for (index, (author_id, uses)) in enumerate(records)) or 'No bot users.'
+                          for (index, (author_id, uses, _)) in enumerate(stats['users'])) or 'No bot users.'
         embed.add_field(name='Top Command Users', value=value, inline=True)
-        query = """SELECT user_id,
-                          COUNT(*) AS "uses"
-                   FROM commands
-                   WHERE guild_id=$1
-                   AND timestamp > (CURRENT_TIMESTAMP - INTERVAL '1 day')
-                   GROUP BY user_id
-                   ORDER BY "uses" DESC
-                   LIMIT 5;
-                """
-        records = await ctx.bot.db.fetch(query, ctx.guild.id)
         value = '\n'.join(f'{lookup[index]}: <@!{author_id}> ({uses} bot uses)'
-                          for (index, (author_id, uses)) in enumerate(records)) or 'No command users.'
+                          for (index, (author_id, uses, _)) in enumerate(stats['users_today'])) or 'No command users.'
         embed.add_field(name='Top Command Users Today', value=value, inline=True)
         await ctx.send(embed=embed)
 
-    @staticmethod
-    async def show_member_stats(ctx, member):
+    @classmethod
+    async def show_member_stats(cls, ctx, member):
         lookup = (
             '\N{FIRST PLACE MEDAL}',
             '\N{SECOND PLACE MEDAL}',
@@ -962,49 +955,39 @@ DuckBot's top role position
         embed = discord.Embed(title='Command Stats', colour=member.colour)
         embed.set_author(name=str(member), icon_url=member.display_avatar.url)
 
-        # total command uses
-        query = "SELECT COUNT(*), MIN(timestamp) FROM commands WHERE guild_id=$1 AND user_id=$2;"
-        count = await ctx.bot.db.fetchrow(query, ctx.guild.id, member.id)
+        query = """WITH top_commands AS (
+                       SELECT command, SUM(uses) AS uses FROM command_user_stats_daily
+                       WHERE guild_id=$1 AND user_id=$2
+                       GROUP BY command ORDER BY uses DESC LIMIT 5
+                   ), top_commands_today AS (
+                       SELECT command, COUNT(*) AS uses FROM commands
+                       WHERE guild_id=$1 AND user_id=$2 AND timestamp > (CURRENT_TIMESTAMP - INTERVAL '1 day')
+                       GROUP BY command ORDER BY uses DESC LIMIT 5
+                   )
+                   SELECT 'total', NULL, COALESCE(SUM(uses), 0), MIN(first_used) FROM command_user_stats_daily
+                   WHERE guild_id=$1 AND user_id=$2
+                   UNION ALL SELECT 'commands', command, uses, NULL FROM top_commands
+                   UNION ALL SELECT 'commands_today', command, uses, NULL FROM top_commands_today;
+                """
+        stats = await cls.fetch_stats(ctx, query, ctx.guild.id, member.id)
 
-        embed.description = f'{count[0]} commands used.'
-        if count[1]:
-            timestamp = count[1].replace(tzinfo=datetime.timezone.utc)
+        # total command uses
+        _, uses, first_used = stats['total'][0]
+        embed.description = f'{uses} commands used.'
+        if first_used:
+            timestamp = first_used.replace(tzinfo=datetime.timezone.utc)
         else:
             timestamp = discord.utils.utcnow()
 
         embed.set_footer(text='First command used').timestamp = timestamp
 
-        query = """SELECT command,
-                          COUNT(*) as "uses"
-                   FROM commands
-                   WHERE guild_id=$1 AND user_id=$2
-                   GROUP BY command
-                   ORDER BY "uses" DESC
-                   LIMIT 5;
-                """
-
-        records = await ctx.bot.db.fetch(query, ctx.guild.id, member.id)
-
         value = '\n'.join(f'{lookup[index]}: {command} ({uses} uses)'
-                          for (index, (command, uses)) in enumerate(records)) or 'No Commands'
+                          for (index, (command, uses, _)) in enumerate(stats['commands'])) or 'No Commands'
 
         embed.add_field(name='Most Used Commands', value=value, inline=False)
 
-        query = """SELECT command,
-                          COUNT(*) as "uses"
-                   FROM commands
-                   WHERE guild_id=$1
-                   AND user_id=$2
-                   AND timestamp > (CURRENT_TIMESTAMP - INTERVAL '1 day')
-                   GROUP BY command
-                   ORDER BY "uses" DESC
-                   LIMIT 5;
-                """
-
-        records = await ctx.bot.db.fetch(query, ctx.guild.id, member.id)
-
         value = '\n'.join(f'{lookup[index]}: {command} ({uses} uses)'
-                          for (index, (command, uses)) in enumerate(records)) or 'No Commands'
+                          for (index, (command, uses, _)) in enumerate(stats['commands_today'])) or 'No Commands'
 
         embed.add_field(name='Most Used Commands Today', value=value, inline=False)
         await ctx.send(embed=embed)
@@ -486,9 +486,45 @@ class Management(commands.Cog, name='Bot Management'):
         @dev_all_history.command(name='clear')
         async def dev_all_history_clear(self, ctx: CustomContext):
             """ Clears all command history """
-            await self.bot.db.execute("DELETE FROM commands")
+            async with self.bot.db.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute("DELETE FROM commands")
+                    if await conn.fetchval("SELECT to_regclass('command_user_stats_daily') IS NOT NULL"):
+                        await conn.execute("DELETE FROM command_stats_daily")
+                        await conn.execute("DELETE FROM command_user_stats_daily")
             await ctx.message.add_reaction('✅')
 
+        @dev.command(name='message-routes', aliases=['routes', 'mr'])
+        async def dev_message_routes(self, ctx: CustomContext):
+            """ Shows how many messages each on_message handler ran for and skipped """
+            stats = self.bot.message_router.stats()
+            if not stats:
+                return await ctx.send("No message routes registered")
+            table = tabulate.tabulate(sorted(stats, key=lambda r: r[1], reverse=True),
+                                      headers=["Handler", "Hits", "Skips"], tablefmt="presto")
+            await ctx.send(f"```\n{table}\n```")
+
+        @dev.command(name='log-webhooks', aliases=['lw'])
+        async def dev_log_webhooks(self, ctx: CustomContext):
+            """ Shows how long logs wait in the queue before each logging webhook delivers them """
+            logging_cog = self.bot.get_cog('LoggingBackend')
+            if not logging_cog or not logging_cog.sender.stats:
+                return await ctx.send("No logs delivered yet")
+            rows = [(webhook_id, stats.sent, f'{stats.average_latency:.2f}s', f'{stats.max_latency:.2f}s')
+                    for webhook_id, stats in sorted(logging_cog.sender.stats.items(),
+                                                    key=lambda i: i[1].average_latency, reverse=True)]
+            table = tabulate.tabulate(rows[:20], headers=["Webhook", "Sent", "Avg wait", "Max wait"], tablefmt="presto")
+            await ctx.send(f"```\n{table}\n```\n{logging_cog.queue.pending} logs pending")
+
+        @dev.command(name='partition-commands')
+        async def dev_partition_commands(self, ctx: CustomContext):
+            """ Migrates the commands table into daily partitions. Locks the table while it runs """
+            handler = self.bot.get_cog('Handler')
+            if await handler.commands_table_is_partitioned():
+                return await ctx.send('The commands table is already partitioned')
+            await handler.partition_commands_table()
+            await ctx.send('Migrated the commands table to daily partitions')
+
         @dev.group(name='sql', aliases=['db', 'database', 'psql', 'postgre'], invoke_without_command=True)
         @commands.is_owner()
         async def dev_sql(self, ctx: CustomContext, *, query: str):
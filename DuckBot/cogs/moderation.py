@@ -575,11 +575,7 @@ class Moderation(commands.Cog):
                 return
 
         if ctx.channel.permissions_for(ctx.me).manage_messages:
-            prefix = await self.bot.get_pre(self.bot, ctx.message)
-            if self.bot.noprefix and await self.bot.is_owner(ctx.author):
-                with contextlib.suppress(ValueError):
-                    prefix.remove('')
-            prefix = tuple(prefix)
+            prefix = tuple(p for p in await self.bot.get_pre(self.bot, ctx.message) if p)
             bulk = True
 
             def check(msg):
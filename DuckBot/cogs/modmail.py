@@ -32,6 +32,14 @@ class ModMail(commands.Cog):
 
     def __init__(self, bot):
         self.bot: DuckBot = bot
+        self.bot.message_router.add_route(self.on_mail, in_guilds=False, in_dms=True, bots=True,
+                                          predicate=lambda m: m.author != self.bot.user and self.bot.dev_mode is not True)
+        self.bot.message_router.add_route(self.on_mail_reply,
+                                          predicate=lambda m: m.channel.category_id == 878123261525901342
+                                          and self.bot.dev_mode is not True)
+
+    def cog_unload(self):
+        self.bot.message_router.remove_routes(self)
 
     async def get_dm_hook(self, channel: discord.TextChannel) -> discord.Webhook:
         if url := self.bot.dm_webhooks.get(channel.id, None):
@@ -40,11 +48,8 @@ class ModMail(commands.Cog):
         self.bot.dm_webhooks[channel.id] = wh.url
         return wh
 
-    @commands.Cog.listener('on_message')
+    # on_mail and on_mail_reply are routed through bot.message_router.
     async def on_mail(self, message: discord.Message):
-        if message.guild or message.author == self.bot.user or self.bot.dev_mode is True:
-            return
-
         ctx = await self.bot.get_context(message)
 
         try:
@@ -84,18 +89,7 @@ class ModMail(commands.Cog):
         except (discord.Forbidden, discord.HTTPException):
             return await message.add_reaction('⚠')
 
-    @commands.Cog.listener('on_message')
     async def on_mail_reply(self, message: discord.Message):
-        if not message.guild:
-            return
-        if any(
-                (message.author.bot,
-                 self.bot.dev_mode is True,
-                 message.channel.category_id != 878123261525901342
-                 )
-        ):
-            return
-
         channel = message.channel
         try:
             user = self.bot.get_user(int(channel.topic)) or \
@@ -24,6 +24,7 @@ from DuckBot.cogs.guild_config import GuildSettings
 from DuckBot.helpers import paginator, time_inputs, constants
 from DuckBot.__main__ import DuckBot, CustomContext
 from DuckBot.helpers import helper
+from DuckBot.helpers.emoji_index import IndexedEmojiConverter, NonReplyEmojiConverter
 from DuckBot.helpers.paginator import PaginatedStringListPageSource, TodoListPaginator
 
 
@@ -733,7 +734,7 @@ class Utility(commands.Cog):
     @commands.group(invoke_without_command=True, aliases=['em'])
     @commands.bot_has_permissions(send_messages=True, embed_links=True)
     async def emoji(self, ctx: CustomContext,
-                    custom_emojis: commands.Greedy[typing.Union[discord.Emoji, discord.PartialEmoji]]):
+                    custom_emojis: commands.Greedy[typing.Union[IndexedEmojiConverter, discord.PartialEmoji]]):
         """
         Shows information about one or more emoji.
         _Note, this is a group, and has also more sub-commands_
@@ -751,7 +752,7 @@ class Utility(commands.Cog):
     @commands.guild_only()
     @commands.has_permissions(manage_emojis=True)
     @commands.bot_has_permissions(manage_emojis=True)
-    async def emoji_lock(self, ctx: CustomContext, server_emoji: discord.Emoji,
+    async def emoji_lock(self, ctx: CustomContext, server_emoji: IndexedEmojiConverter,
                          roles: commands.Greedy[discord.Role]) -> discord.Message:
         """
         Locks an emoji to one or multiple roles. Input as many roles as you want in the "[roles]..." parameter.
@@ -775,7 +776,7 @@ class Utility(commands.Cog):
     @commands.guild_only()
     @commands.has_permissions(manage_emojis=True)
     @commands.bot_has_permissions(manage_emojis=True)
-    async def emoji_unlock(self, ctx: CustomContext, server_emoji: discord.Emoji) -> discord.Message:
+    async def emoji_unlock(self, ctx: CustomContext, server_emoji: IndexedEmojiConverter) -> discord.Message:
         """
         Unlocks a locked emoji.
         **Note:** If you don't have access to the emoji you can also do:
@@ -836,7 +837,7 @@ class Utility(commands.Cog):
     @commands.has_permissions(manage_emojis=True)
     @commands.bot_has_permissions(manage_emojis=True)
     async def emoji_clone(self, ctx: CustomContext,
-                          server_emoji: typing.Optional[discord.PartialEmoji],
+                          server_emoji: typing.Optional[typing.Union[discord.PartialEmoji, NonReplyEmojiConverter]],
                           index: typing.Optional[int] = 1, *, name: typing.Optional[str] = '#'):
         """
         Clones an emoji into the current server.
@@ -892,7 +893,7 @@ class Utility(commands.Cog):
     @commands.guild_only()
     @commands.has_permissions(manage_emojis=True)
     @commands.bot_has_permissions(manage_emojis=True)
-    async def emoji_delete(self, ctx: CustomContext, server_emoji: discord.Emoji):
+    async def emoji_delete(self, ctx: CustomContext, server_emoji: IndexedEmojiConverter):
         """
         Deletes an emoji from this server.
         """
@@ -910,7 +911,7 @@ class Utility(commands.Cog):
     @commands.guild_only()
     @commands.has_permissions(manage_emojis=True)
     @commands.bot_has_permissions(manage_emojis=True)
-    async def emoji_rename(self, ctx, server_emoji: discord.Emoji, new_name: commands.clean_content):
+    async def emoji_rename(self, ctx, server_emoji: IndexedEmojiConverter, new_name: commands.clean_content):
         """
         Renames an emoji from this server.
         """
@@ -961,26 +962,22 @@ class Utility(commands.Cog):
 
     @commands.command()
     async def afk(self, ctx: CustomContext, *, reason: commands.clean_content = '...'):
-        if ctx.author.id in self.bot.afk_users and ctx.author.id in self.bot.auto_un_afk and self.bot.auto_un_afk[ctx.author.id] is True:
+        entry = self.bot.afk.get(ctx.author.id)
+        if ctx.author.id in self.bot.afk.afk_users and entry.auto_un_afk is True:
             return
-        if ctx.author.id not in self.bot.afk_users:
-            await self.bot.db.execute('INSERT INTO afk (user_id, start_time, reason) VALUES ($1, $2, $3) '
-                                      'ON CONFLICT (user_id) DO UPDATE SET start_time = $2, reason = $3',
-                                      ctx.author.id, ctx.message.created_at, reason[0:1800])
-            self.bot.afk_users[ctx.author.id] = True
+        if ctx.author.id not in self.bot.afk.afk_users:
+            self.bot.afk.set_afk(ctx.author.id, ctx.message.created_at, reason[0:1800])
             await ctx.send(f'**You are now afk!** {constants.ROO_SLEEP}'
                            f'\n**with reason:** {reason}')
         else:
-            self.bot.afk_users.pop(ctx.author.id)
-
-            info = await self.bot.db.fetchrow('SELECT * FROM afk WHERE user_id = $1', ctx.author.id)
-            await self.bot.db.execute('INSERT INTO afk (user_id, start_time, reason) VALUES ($1, null, null) '
-                                      'ON CONFLICT (user_id) DO UPDATE SET start_time = null, reason = null',
-                                      ctx.author.id)
+            info = self.bot.afk.clear_afk(ctx.author.id)
+            if not info:
+                return
+            start_time, afk_reason = info
 
             await ctx.channel.send(
-                f'**Welcome back, {ctx.author.mention}, afk since: {discord.utils.format_dt(info["start_time"], "R")}**'
-                f'\n**With reason:** {info["reason"]}', delete_after=10)
+                f'**Welcome back, {ctx.author.mention}, afk since: {discord.utils.format_dt(start_time, "R")}**'
+                f'\n**With reason:** {afk_reason}', delete_after=10)
 
             await ctx.message.add_reaction('👋')
 
@@ -990,11 +987,10 @@ class Utility(commands.Cog):
         Toggles weather to remove the AFK status automatically or not.
         mode: either enabled or disabled. If none, it will toggle it.
         """
-        mode = mode or (False if (ctx.author.id in self.bot.auto_un_afk and self.bot.auto_un_afk[
-            ctx.author.id] is True) or ctx.author.id not in self.bot.auto_un_afk else True)
-        self.bot.auto_un_afk[ctx.author.id] = mode
-        await self.bot.db.execute('INSERT INTO afk (user_id, auto_un_afk) VALUES ($1, $2) '
-                                  'ON CONFLICT (user_id) DO UPDATE SET auto_un_afk = $2', ctx.author.id, mode)
+        entry = self.bot.afk.get(ctx.author.id)
+        current = entry.auto_un_afk if entry else None
+        mode = mode or (False if current is True or current is None else True)
+        self.bot.afk.set_auto_un_afk(ctx.author.id, mode)
         return await ctx.send(f'{"Enabled" if mode is True else "Disabled"} automatic AFK removal.'
                               f'\n{"**Remove your AFK status by running the `afk` command while being AFK**" if mode is False else ""}')
 
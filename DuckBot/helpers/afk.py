@@ -0,0 +1,82 @@
+import asyncio
+import datetime
+import logging
+import typing
+
+from DuckBot.helpers.periodic_flush import PeriodicFlusher
+
+
+class AfkEntry:
+    __slots__ = ('start_time', 'reason', 'auto_un_afk')
+
+    def __init__(self, start_time: typing.Optional[datetime.datetime] = None, reason: typing.Optional[str] = None,
+                 auto_un_afk: typing.Optional[bool] = None):
+        self.start_time = start_time
+        self.reason = reason
+        self.auto_un_afk = auto_un_afk
+
+    def as_tuple(self) -> tuple:
+        return self.start_time, self.reason, self.auto_un_afk
+
+
+class AfkStore(PeriodicFlusher):
+    """
+    Keeps the `afk` table in memory. Reads never touch the database; changes are
+    marked dirty and written behind in batches every `interval` seconds and on close.
+    """
+
+    def __init__(self, bot, *, interval: float = 5.0):
+        super().__init__(interval=interval)
+        self.bot = bot
+        self.entries: typing.Dict[int, AfkEntry] = {}
+        self.afk_users: typing.Set[int] = set()
+        self._dirty: typing.Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def get(self, user_id: int) -> typing.Optional[AfkEntry]:
+        return self.entries.get(user_id)
+
+    def load(self, records: typing.Iterable[typing.Tuple[int, typing.Optional[datetime.datetime], typing.Optional[str], typing.Optional[bool]]]) -> None:
+        """ Replaces the cache with the given (user_id, start_time, reason, auto_un_afk) rows, keeping unsaved changes. """
+        entries = {user_id: AfkEntry(start_time, reason, auto_un_afk) for user_id, start_time, reason, auto_un_afk in records}
+        for user_id in self._dirty:
+            if user_id in self.entries:
+                entries[user_id] = self.entries[user_id]
+        self.entries = entries
+        self.afk_users = {user_id for user_id, entry in entries.items() if entry.start_time}
+
+    def set_afk(self, user_id: int, start_time: datetime.datetime, reason: str) -> None:
+        entry = self.entries.setdefault(user_id, AfkEntry())
+        entry.start_time = start_time
+        entry.reason = reason
+        self.afk_users.add(user_id)
+        self._dirty.add(user_id)
+
+    def clear_afk(self, user_id: int) -> typing.Optional[typing.Tuple[datetime.datetime, str]]:
+        """ Removes the AFK status and returns the previous (start_time, reason), or None if the user was not AFK. """
+        entry = self.entries.get(user_id)
+        if not entry or user_id not in self.afk_users:
+            return None
+        info = entry.start_time, entry.reason
+        entry.start_time = entry.reason = None
+        self.afk_users.discard(user_id)
+        self._dirty.add(user_id)
+        return info
+
+    def set_auto_un_afk(self, user_id: int, mode: bool) -> None:
+        self.entries.setdefault(user_id, AfkEntry()).auto_un_afk = mode
+        self._dirty.add(user_id)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            rows = [(user_id, *self.entries[user_id].as_tuple()) for user_id in dirty]
+            try:
+                await self.bot.db.executemany(
+                    'INSERT INTO afk (user_id, start_time, reason, auto_un_afk) VALUES ($1, $2, $3, $4) '
+                    'ON CONFLICT (user_id) DO UPDATE SET start_time = $2, reason = $3, auto_un_afk = $4', rows)
+            except Exception as e:
+                logging.error(f'Could not write {len(rows)} afk entries', exc_info=e)
+                self._dirty |= dirty
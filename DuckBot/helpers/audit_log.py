@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import time
+import typing
+
+import discord
+
+EntryKey = typing.Tuple[discord.AuditLogAction, int]
+
+
+class AuditLogCorrelator:
+    """
+    Finds the audit log entry behind a gateway event, to tell who did it. Each guild's audit log is
+    fetched at most once every `window` seconds, newest first, stopping at the entries already seen.
+    Entries are indexed by (action, target id), and lookups made while a fetch is pending wait for
+    that same fetch instead of making their own.
+    """
+
+    def __init__(self, *, window: float = 5.0, delay: float = 1.0, max_age: float = 30.0, limit: int = 50):
+        self.window = window
+        self.delay = delay
+        self.max_age = max_age
+        self.limit = limit
+        self._entries: typing.Dict[int, typing.Dict[EntryKey, discord.AuditLogEntry]] = {}
+        self._last_entry: typing.Dict[int, int] = {}
+        self._last_fetch: typing.Dict[int, float] = {}
+        self._pending: typing.Dict[int, asyncio.Task] = {}
+
+    def _lookup(self, guild_id: int, target_id: int,
+                actions: typing.Iterable[discord.AuditLogAction]) -> typing.Optional[discord.AuditLogEntry]:
+        entries = self._entries.get(guild_id, {})
+        now = discord.utils.utcnow()
+        for action in actions:
+            entry = entries.get((action, target_id))
+            if entry and (now - entry.created_at).total_seconds() <= self.max_age:
+                return entry
+
+    async def find(self, guild: discord.Guild, target_id: int,
+                   *actions: discord.AuditLogAction) -> typing.Optional[discord.AuditLogEntry]:
+        """ The recent entry for any of the actions on the target, or None if there is none or the audit log can't be read. """
+        if not guild.me or not guild.me.guild_permissions.view_audit_log:
+            return None
+        entry = self._lookup(guild.id, target_id, actions)
+        if entry:
+            return entry
+        task = self._pending.get(guild.id)
+        if not task:
+            task = self._pending[guild.id] = asyncio.get_event_loop().create_task(self._fetch(guild))
+        await asyncio.shield(task)
+        return self._lookup(guild.id, target_id, actions)
+
+    async def _fetch(self, guild: discord.Guild) -> None:
+        try:
+            # The audit log entry is written shortly after the event is dispatched.
+            await asyncio.sleep(max(self.delay, self._last_fetch.get(guild.id, 0) + self.window - time.monotonic()))
+            self._last_fetch[guild.id] = time.monotonic()
+            last_entry = self._last_entry.get(guild.id, 0)
+            fetched: typing.Dict[EntryKey, discord.AuditLogEntry] = {}
+            async for entry in guild.audit_logs(limit=self.limit):
+                if entry.id <= last_entry:
+                    break
+                if entry.target is not None:
+                    fetched.setdefault((entry.action, entry.target.id), entry)
+                self._last_entry[guild.id] = max(self._last_entry.get(guild.id, 0), entry.id)
+            entries = self._entries.setdefault(guild.id, {})
+            entries.update(fetched)
+            now = discord.utils.utcnow()
+            for key in [k for k, e in entries.items() if (now - e.created_at).total_seconds() > self.max_age]:
+                del entries[key]
+        except discord.HTTPException as e:
+            logging.info(f'Could not fetch the audit log of {guild.id}: {e}')
+        finally:
+            self._pending.pop(guild.id, None)
+
+    def remove_guild(self, guild_id: int) -> None:
+        self._entries.pop(guild_id, None)
+        self._last_entry.pop(guild_id, None)
+        self._last_fetch.pop(guild_id, None)
+
+    def close(self) -> None:
+        for task in self._pending.values():
+            task.cancel()
+        self._pending = {}
@@ -0,0 +1,66 @@
+import difflib
+import typing
+from collections import defaultdict
+
+from discord.ext import commands
+
+
+def _trigrams(word: str) -> typing.Set[str]:
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CommandSuggestionIndex:
+    """
+    A trigram index over the top-level command names and aliases, used for "did you mean" suggestions.
+    It is rebuilt lazily after commands are added or removed, so once per extension load.
+    """
+
+    def __init__(self, bot: commands.Bot, *, cutoff: float = 0.6):
+        self.bot = bot
+        self.cutoff = cutoff
+        self._names: typing.Dict[str, commands.Command] = {}
+        self._trigrams: typing.Optional[typing.Dict[str, typing.Set[str]]] = None
+
+    def invalidate(self) -> None:
+        self._trigrams = None
+
+    def _build(self) -> None:
+        self._names = {name.lower(): command for command in self.bot.commands
+                       for name in (command.name, *command.aliases)}
+        trigrams = defaultdict(set)
+        for name in self._names:
+            for gram in _trigrams(name):
+                trigrams[gram].add(name)
+        self._trigrams = dict(trigrams)
+
+    def candidates(self, word: str) -> typing.List[str]:
+        """ Returns the names close to `word`, best match first, like difflib.get_close_matches. """
+        if self._trigrams is None:
+            self._build()
+        word = word.lower()
+        names = set()
+        for gram in _trigrams(word):
+            names.update(self._trigrams.get(gram, ()))
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(word)
+        scored = []
+        for name in names:
+            matcher.set_seq1(name)
+            if matcher.real_quick_ratio() >= self.cutoff and matcher.quick_ratio() >= self.cutoff:
+                ratio = matcher.ratio()
+                if ratio >= self.cutoff:
+                    scored.append((ratio, name))
+        return [name for _, name in sorted(scored, reverse=True)]
+
+    async def suggest(self, ctx: commands.Context, word: str) -> typing.Optional[str]:
+        """ Returns the closest name whose command the invoker can run. Checks only run for the candidates. """
+        for name in self.candidates(word):
+            # noinspection PyBroadException
+            try:
+                if await self._names[name].can_run(ctx):
+                    return name
+            except Exception:
+                continue
+        return None
@@ -0,0 +1,124 @@
+import asyncio
+import datetime
+import logging
+import typing
+from collections import defaultdict
+
+from DuckBot.helpers.periodic_flush import PeriodicFlusher
+
+UsageRow = typing.Tuple[typing.Optional[int], int, str, datetime.datetime]
+
+
+class CommandUsageRecorder(PeriodicFlusher):
+    """
+    Buffers rows for the `commands` table in memory and writes them with COPY,
+    every `max_rows` rows or every `interval` seconds, whichever comes first.
+
+    Each flush also folds the guild rows into the daily rollup tables that back the `stats` command.
+    """
+
+    COLUMNS = ('guild_id', 'user_id', 'command', 'timestamp')
+    ROLLUP_SCHEMA = (
+        """CREATE TABLE command_stats_daily (
+               guild_id BIGINT NOT NULL,
+               command TEXT NOT NULL,
+               day DATE NOT NULL,
+               uses INTEGER NOT NULL,
+               first_used TIMESTAMPTZ NOT NULL,
+               PRIMARY KEY (guild_id, command, day)
+           )""",
+        """CREATE TABLE command_user_stats_daily (
+               guild_id BIGINT NOT NULL,
+               user_id BIGINT NOT NULL,
+               command TEXT NOT NULL,
+               day DATE NOT NULL,
+               uses INTEGER NOT NULL,
+               first_used TIMESTAMPTZ NOT NULL,
+               PRIMARY KEY (guild_id, user_id, command, day)
+           )""",
+        """INSERT INTO command_stats_daily (guild_id, command, day, uses, first_used)
+           SELECT guild_id, command, (timestamp AT TIME ZONE 'UTC')::date, COUNT(*), MIN(timestamp)
+           FROM commands WHERE guild_id IS NOT NULL GROUP BY guild_id, command, (timestamp AT TIME ZONE 'UTC')::date""",
+        """INSERT INTO command_user_stats_daily (guild_id, user_id, command, day, uses, first_used)
+           SELECT guild_id, user_id, command, (timestamp AT TIME ZONE 'UTC')::date, COUNT(*), MIN(timestamp)
+           FROM commands WHERE guild_id IS NOT NULL GROUP BY guild_id, user_id, command, (timestamp AT TIME ZONE 'UTC')::date""",
+    )
+
+    def __init__(self, bot, *, max_rows: int = 100, interval: float = 5.0, max_pending: int = 10_000):
+        super().__init__(interval=interval)
+        self.bot = bot
+        self.max_rows = max_rows
+        self.max_pending = max_pending
+        self._rows: typing.List[UsageRow] = []
+        self._lock = asyncio.Lock()
+        self._rollups_ready = False
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._rows)
+
+    def record(self, guild_id: typing.Optional[int], user_id: int, command: str, timestamp: datetime.datetime) -> None:
+        self._rows.append((guild_id, user_id, command, timestamp))
+        if len(self._rows) >= self.max_rows:
+            self.wake()
+
+    async def _run(self) -> None:
+        try:
+            await self.ensure_rollups()
+        except Exception as e:
+            logging.error('Could not create the command stats rollups', exc_info=e)
+        await super()._run()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._rows:
+                return
+            rows, self._rows = self._rows, []
+            try:
+                await self.ensure_rollups()
+                async with self.bot.db.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.copy_records_to_table('commands', records=rows, columns=self.COLUMNS)
+                        await self._update_rollups(conn, rows)
+            except Exception as e:
+                logging.error(f'Could not write {len(rows)} command usage rows', exc_info=e)
+                # Keep the rows for the next flush, dropping the oldest ones if the database stays unavailable.
+                self._rows = (rows + self._rows)[-self.max_pending:]
+
+    async def ensure_rollups(self) -> None:
+        """ Creates the rollup tables, backfilled from the raw commands table, if they do not exist yet. """
+        if self._rollups_ready:
+            return
+        async with self.bot.db.acquire() as conn:
+            async with conn.transaction():
+                if not await conn.fetchval("SELECT to_regclass('command_user_stats_daily') IS NOT NULL"):
+                    for statement in self.ROLLUP_SCHEMA:
+                        await conn.execute(statement)
+        self._rollups_ready = True
+
+    @staticmethod
+    async def _update_rollups(conn, rows: typing.List[UsageRow]) -> None:
+        commands = defaultdict(lambda: [0, None])
+        users = defaultdict(lambda: [0, None])
+        for guild_id, user_id, command, timestamp in rows:
+            if guild_id is None:
+                continue
+            # Days are UTC days, the same as the backfill in ROLLUP_SCHEMA.
+            day = timestamp.astimezone(datetime.timezone.utc).date()
+            for entry in (commands[(guild_id, command, day)], users[(guild_id, user_id, command, day)]):
+                entry[0] += 1
+                entry[1] = timestamp if entry[1] is None else min(entry[1], timestamp)
+
+        await conn.executemany(
+            """INSERT INTO command_stats_daily (guild_id, command, day, uses, first_used) VALUES ($1, $2, $3, $4, $5)
+               ON CONFLICT (guild_id, command, day) DO UPDATE
+               SET uses = command_stats_daily.uses + excluded.uses,
+                   first_used = LEAST(command_stats_daily.first_used, excluded.first_used)""",
+            [(*key, uses, first_used) for key, (uses, first_used) in commands.items()])
+        await conn.executemany(
+            """INSERT INTO command_user_stats_daily (guild_id, user_id, command, day, uses, first_used)
+               VALUES ($1, $2, $3, $4, $5, $6)
+               ON CONFLICT (guild_id, user_id, command, day) DO UPDATE
+               SET uses = command_user_stats_daily.uses + excluded.uses,
+                   first_used = LEAST(command_user_stats_daily.first_used, excluded.first_used)""",
+            [(*key, uses, first_used) for key, (uses, first_used) in users.items()])
@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import traceback
+import typing
+from collections import OrderedDict, deque
+
+from DuckBot.helpers.periodic_flush import PeriodicFlusher
+
+
+class CountHistory:
+    """
+    The last `maxlen` correct counts of a guild, as message_id -> (author_id, number), oldest first.
+    Looking up, removing and rolling back the last count are all O(1).
+    """
+    __slots__ = ('maxlen', '_counts')
+
+    def __init__(self, maxlen: int = 100):
+        self.maxlen = maxlen
+        self._counts: typing.OrderedDict[int, typing.Tuple[int, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._counts
+
+    @property
+    def last(self) -> typing.Optional[typing.Tuple[int, int, int]]:
+        """ The last count as (message_id, author_id, number), or None if there is none. """
+        if not self._counts:
+            return None
+        message_id = next(reversed(self._counts))
+        return (message_id, *self._counts[message_id])
+
+    def append(self, message_id: int, author_id: int, number: int) -> None:
+        self._counts[message_id] = (author_id, number)
+        if len(self._counts) > self.maxlen:
+            self._counts.popitem(last=False)
+
+    def remove(self, message_id: int) -> typing.Optional[typing.Tuple[int, int]]:
+        """ Forgets a count and returns its (author_id, number), or None if it was not tracked. """
+        return self._counts.pop(message_id, None)
+
+
+class CountingActors(PeriodicFlusher):
+    """
+    Runs the counting game one event at a time per guild, in the order the events arrived,
+    and writes the current number of each guild to the database at most every `interval` seconds.
+    """
+
+    def __init__(self, bot, *, interval: float = 3.0):
+        super().__init__(interval=interval)
+        self.bot = bot
+        self._queues: typing.Dict[int, typing.Deque[tuple]] = {}
+        self._workers: typing.Dict[int, asyncio.Task] = {}
+        self._dirty: typing.Set[int] = set()
+        self._lock = asyncio.Lock()
+
+    def submit(self, guild_id: int, func: typing.Callable[..., typing.Awaitable], *args) -> None:
+        self._queues.setdefault(guild_id, deque()).append((func, args))
+        if guild_id not in self._workers:
+            self._workers[guild_id] = self.bot.loop.create_task(self._work(guild_id))
+
+    async def _work(self, guild_id: int) -> None:
+        queue = self._queues[guild_id]
+        try:
+            while queue:
+                func, args = queue.popleft()
+                try:
+                    await func(*args)
+                except Exception:
+                    logging.error(f'Counting event failed in guild {guild_id}\n{traceback.format_exc()}')
+        finally:
+            # Nothing is awaited between the empty check and this cleanup, so no event can be left behind.
+            self._workers.pop(guild_id, None)
+            self._queues.pop(guild_id, None)
+
+    def mark_dirty(self, guild_id: int) -> None:
+        self._dirty.add(guild_id)
+
+    def is_dirty(self, guild_id: int) -> bool:
+        return guild_id in self._dirty
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._dirty:
+                return
+            dirty, self._dirty = self._dirty, set()
+            rows = [(guild_id, settings['number'], settings['last_counter']) for guild_id in dirty
+                    if (settings := self.bot.counting_channels.get(guild_id))]
+            try:
+                await self.bot.db.executemany('UPDATE count_settings SET current_number = $2, last_counter = $3 '
+                                              'WHERE guild_id = $1', rows)
+            except Exception as e:
+                logging.error(f'Could not save the counting numbers of {len(rows)} guilds', exc_info=e)
+                self._dirty |= dirty
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import time
+import typing
+from collections import Counter
+
+import discord
+
+
+class DiscriminatorIndex:
+    """
+    The discriminators, with at most two distinct digits, of members that look like they have nitro
+    (boosting or an animated avatar). Every such member counts once per guild, and a discriminator
+    stays in the index while at least one member counts for it.
+
+    The index is built once from the member cache and then kept current from the member events.
+    """
+
+    def __init__(self):
+        # guild_id -> {user_id: discriminator}, grouped per guild so a guild can be dropped without a full scan.
+        self._members: typing.Dict[int, typing.Dict[int, str]] = {}
+        self._counts: typing.Counter[str] = Counter()
+        self._sorted: typing.Optional[typing.List[str]] = []
+        self.build_time: typing.Optional[float] = None
+
+    @staticmethod
+    def qualifies(member: discord.Member) -> bool:
+        return bool(member.premium_since or member.display_avatar.is_animated()) \
+            and len(set(member.discriminator)) < 3
+
+    @property
+    def discriminators(self) -> typing.List[str]:
+        """ The sorted list of discriminators, rebuilt only after one was added or dropped. """
+        if self._sorted is None:
+            self._sorted = sorted(self._counts)
+        return self._sorted
+
+    def _add(self, guild_id: int, user_id: int, discriminator: str) -> None:
+        self._members.setdefault(guild_id, {})[user_id] = discriminator
+        self._counts[discriminator] += 1
+        if self._counts[discriminator] == 1:
+            self._sorted = None
+
+    def _uncount(self, discriminator: str) -> None:
+        self._counts[discriminator] -= 1
+        if self._counts[discriminator] <= 0:
+            del self._counts[discriminator]
+            self._sorted = None
+
+    def _discard(self, guild_id: int, user_id: int) -> None:
+        members = self._members.get(guild_id)
+        if not members or user_id not in members:
+            return
+        self._uncount(members.pop(user_id))
+        if not members:
+            del self._members[guild_id]
+
+    def update(self, member: discord.Member) -> None:
+        """ Adds, moves or removes the member, depending on whether and under which discriminator it counts now. """
+        guild_id, user_id = member.guild.id, member.id
+        if self._members.get(guild_id, {}).get(user_id) == member.discriminator and self.qualifies(member):
+            return
+        self._discard(guild_id, user_id)
+        if self.qualifies(member):
+            self._add(guild_id, user_id, member.discriminator)
+
+    def remove(self, member: discord.Member) -> None:
+        self._discard(member.guild.id, member.id)
+
+    def update_user(self, user: discord.User) -> None:
+        """ A user's avatar or discriminator changed, which applies to every guild they share with the bot. """
+        for guild in user.mutual_guilds:
+            if member := guild.get_member(user.id):
+                self.update(member)
+
+    def add_guild(self, guild: discord.Guild) -> None:
+        for member in guild.members:
+            self.update(member)
+
+    def remove_guild(self, guild: discord.Guild) -> None:
+        for discriminator in self._members.pop(guild.id, {}).values():
+            self._uncount(discriminator)
+
+    async def build(self, guilds: typing.Iterable[discord.Guild]) -> None:
+        """ Indexes every cached member, yielding to the event loop between guilds. """
+        start = time.perf_counter()
+        for guild in list(guilds):
+            self.add_guild(guild)
+            await asyncio.sleep(0)
+        self.build_time = time.perf_counter() - start
+        logging.info(f'Indexed {len(self._counts)} common discriminators in {self.build_time:.2f}s')
@@ -0,0 +1,48 @@
+import typing
+
+import discord
+
+MAX_EMBEDS = 10
+MAX_CHARACTERS = 6000
+MAX_DESCRIPTION = 4096
+ATTACHED_NOTE = '\n\n*… too long, the full log is attached.*'
+
+
+def embed_to_text(embed: discord.Embed) -> str:
+    parts = [embed.author.name, embed.title, embed.description]
+    parts += [f'{field.name}\n{field.value}' for field in embed.fields]
+    parts.append(embed.footer.text)
+    return '\n\n'.join(str(part) for part in parts if part)
+
+
+def fit_embed(embed: discord.Embed) -> typing.Tuple[discord.Embed, int, typing.Optional[str]]:
+    """
+    Returns (embed, size, attachment). An embed over the per-message character limit is replaced
+    by a copy without fields and with a shortened description, and its full text is returned
+    to be sent as a file alongside it.
+    """
+    size = len(embed)
+    if size <= MAX_CHARACTERS:
+        return embed, size, None
+
+    short = embed.copy()
+    short.clear_fields()
+    description = str(embed.description or '')
+    budget = MAX_CHARACTERS - (len(short) - len(description)) - len(ATTACHED_NOTE)
+    short.description = description[:max(0, min(MAX_DESCRIPTION - len(ATTACHED_NOTE), budget))] + ATTACHED_NOTE
+    return short, len(short), embed_to_text(embed)
+
+
+def take_batch(pending: typing.Deque, size: typing.Callable[[typing.Any], int]) -> typing.List:
+    """
+    Pops the longest run of pending items that fits in one message: at most 10 embeds
+    and 6000 characters in total. The first item is always taken, as each one fits on its own.
+    """
+    batch, total = [], 0
+    while pending and len(batch) < MAX_EMBEDS:
+        item_size = size(pending[0])
+        if batch and total + item_size > MAX_CHARACTERS:
+            break
+        batch.append(pending.popleft())
+        total += item_size
+    return batch
@@ -0,0 +1,86 @@
+import re
+import typing
+
+import discord
+from discord.ext import commands
+
+EMOJI_ID_OR_MENTION = re.compile(r'^(<a?:[a-zA-Z0-9_]{1,32}:)?([0-9]{15,20})>?$')
+
+
+class EmojiIndex:
+    """
+    Case-insensitive name lookup for every custom emoji the bot can see.
+    Kept current from the emoji update, guild join and guild remove events, instead of
+    scanning `bot.emojis` for each name.
+    """
+
+    def __init__(self):
+        self._names: typing.Dict[str, typing.Dict[int, discord.Emoji]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(emojis) for emojis in self._names.values())
+
+    def add(self, emojis: typing.Iterable[discord.Emoji]) -> None:
+        for emoji in emojis:
+            self._names.setdefault(emoji.name.lower(), {})[emoji.id] = emoji
+
+    def remove(self, emojis: typing.Iterable[discord.Emoji]) -> None:
+        for emoji in emojis:
+            name = emoji.name.lower()
+            same_name = self._names.get(name)
+            if same_name is None:
+                continue
+            same_name.pop(emoji.id, None)
+            if not same_name:
+                del self._names[name]
+
+    def rebuild(self, emojis: typing.Iterable[discord.Emoji]) -> None:
+        self._names = {}
+        self.add(emojis)
+
+    def get(self, name: str, *, guild: typing.Optional[discord.Guild] = None,
+            usable_only: bool = False) -> typing.Optional[discord.Emoji]:
+        """
+        Returns an emoji with this name, ignoring case. Emojis from `guild` come first, then usable ones.
+        With `usable_only`, an emoji the bot cannot use is never returned.
+        """
+        same_name = self._names.get(name.lower())
+        if not same_name:
+            return None
+        best = None
+        for emoji in same_name.values():
+            usable = emoji.is_usable()
+            if guild and emoji.guild_id == guild.id and (usable or not usable_only):
+                return emoji
+            if usable and (best is None or not best.is_usable()):
+                best = emoji
+            elif best is None and not usable_only:
+                best = emoji
+        return best
+
+
+class IndexedEmojiConverter(commands.EmojiConverter):
+    """
+    Converts to a discord.Emoji like commands.EmojiConverter, but names are
+    looked up in the bot's emoji index, case-insensitively, preferring the current server's emojis.
+    """
+
+    async def convert(self, ctx: commands.Context, argument: str) -> discord.Emoji:
+        if EMOJI_ID_OR_MENTION.match(argument):
+            return await super().convert(ctx, argument)
+        emoji = ctx.bot.emoji_index.get(argument.strip(':'), guild=ctx.guild)
+        if emoji is None:
+            raise commands.EmojiNotFound(argument)
+        return emoji
+
+
+class NonReplyEmojiConverter(IndexedEmojiConverter):
+    """
+    Like IndexedEmojiConverter, but when the command replies to a message a plain name is
+    not looked up, so it is left for the command's other arguments.
+    """
+
+    async def convert(self, ctx: commands.Context, argument: str) -> discord.Emoji:
+        if ctx.message.reference and not EMOJI_ID_OR_MENTION.match(argument):
+            raise commands.BadArgument(f'{argument!r} is taken as a name in replies.')
+        return await super().convert(ctx, argument)
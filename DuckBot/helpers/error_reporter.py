@@ -0,0 +1,95 @@
+import contextlib
+import hashlib
+import io
+import logging
+import time
+import traceback
+import typing
+
+import discord
+
+from DuckBot.helpers.periodic_flush import PeriodicFlusher
+
+
+class _Report:
+    __slots__ = ('message', 'summary', 'repeats', 'last_seen')
+
+    def __init__(self, summary: str):
+        self.message: typing.Optional[discord.Message] = None
+        self.summary = summary
+        self.repeats = 0
+        self.last_seen = time.monotonic()
+
+
+class ErrorReporter(PeriodicFlusher):
+    """
+    Sends unexpected errors to the error channel, once per kind of error.
+
+    Errors are fingerprinted by their type and the frames they went through. The first one is
+    reported right away; repeats within the next `window` seconds are only counted, and sent
+    as one summary replying to the first report when the window ends.
+    """
+
+    def __init__(self, bot, channel_id: int, *, window: float = 60.0):
+        super().__init__(interval=window)
+        self.bot = bot
+        self.channel_id = channel_id
+        self.window = window
+        self._reports: typing.Dict[str, _Report] = {}
+
+    @staticmethod
+    def fingerprint(error: BaseException) -> str:
+        frames = traceback.extract_tb(error.__traceback__)
+        key = '|'.join([type(error).__qualname__] + [f'{f.filename}:{f.lineno}:{f.name}' for f in frames])
+        return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+    async def report(self, error: BaseException, *, header: str, title: str = '') -> typing.Optional[discord.Message]:
+        """ Reports the error, returning the message sent, or None if it was only counted as a repeat. """
+        fingerprint = self.fingerprint(error)
+        report = self._reports.get(fingerprint)
+        if report:
+            report.repeats += 1
+            report.last_seen = time.monotonic()
+            return None
+        report = self._reports[fingerprint] = _Report(f'{type(error).__name__}: {str(error)[:200]}')
+
+        traceback_string = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+        logging.error(f'{header} [{fingerprint}]\n{traceback_string}')
+
+        await self.bot.wait_until_ready()
+        channel = self.bot.get_channel(self.channel_id)
+        if not channel:
+            return None
+        to_send = f"```yaml\n{header}``````py\n{title}{traceback_string}\n```"
+        if len(to_send) < 2000:
+            with contextlib.suppress(discord.HTTPException):
+                report.message = await channel.send(to_send)
+        # Too long, or the message could not be sent: send the traceback as a file instead.
+        if not report.message:
+            try:
+                report.message = await channel.send(f"```yaml\n{header}``````py\n{title}\n```",
+                                                    file=discord.File(io.StringIO(traceback_string),
+                                                                      filename='traceback.py'))
+            except discord.HTTPException:
+                return None
+        return report.message
+
+    async def flush(self) -> None:
+        await self.send_summaries()
+
+    async def send_summaries(self) -> None:
+        """ Sends the repeat counts, and forgets the errors that have not happened for a whole window. """
+        now = time.monotonic()
+        channel = self.bot.get_channel(self.channel_id)
+        for fingerprint, report in list(self._reports.items()):
+            if report.repeats and channel:
+                try:
+                    await channel.send(f"```yaml\n{report.summary}\nrepeated {report.repeats} more time(s) "
+                                       f"[{fingerprint}]```",
+                                       reference=report.message.to_reference(fail_if_not_exists=False)
+                                       if report.message else None)
+                except (discord.Forbidden, discord.HTTPException):
+                    pass
+                report.repeats = 0
+            elif now - report.last_seen >= self.window:
+                del self._reports[fingerprint]
@@ -0,0 +1,79 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import logging
+import time
+import typing
+
+Key = typing.Hashable
+
+
+class ExpiryScheduler:
+    """
+    Calls `callback(key)` once each key reaches its expiry, a POSIX timestamp. Expiries are kept
+    in a min-heap and a single task sleeps until the earliest one. Cancelling or rescheduling a
+    key leaves its old heap entry behind; it is skipped when it reaches the top of the heap.
+    """
+
+    def __init__(self, callback: typing.Callable[[Key], None]):
+        self.callback = callback
+        self._heap: typing.List[typing.Tuple[float, int, Key]] = []
+        self._expiries: typing.Dict[Key, float] = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: typing.Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def schedule(self, key: Key, expires_at: float) -> None:
+        if self._expiries.get(key) == expires_at:
+            return
+        self._expiries[key] = expires_at
+        entry = (expires_at, next(self._counter), key)
+        heapq.heappush(self._heap, entry)
+        if self._heap[0] is entry:
+            self._wakeup.set()
+        self._compact()
+
+    def cancel(self, key: Key) -> None:
+        self._expiries.pop(key, None)
+        self._compact()
+
+    def _is_live(self, entry: typing.Tuple[float, int, Key]) -> bool:
+        return self._expiries.get(entry[2]) == entry[0]
+
+    def _compact(self) -> None:
+        """ Drops the skipped entries once they make up most of the heap. """
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._expiries):
+            self._heap = [entry for entry in self._heap if self._is_live(entry)]
+            heapq.heapify(self._heap)
+
+    def start(self) -> None:
+        self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            while self._heap and not self._is_live(self._heap[0]):
+                heapq.heappop(self._heap)
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                continue
+            _, _, key = heapq.heappop(self._heap)
+            del self._expiries[key]
+            try:
+                self.callback(key)
+            except Exception as e:
+                logging.error(f'Expiry callback failed for {key!r}', exc_info=e)
+
+    def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
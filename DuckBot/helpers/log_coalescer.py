@@ -0,0 +1,80 @@
+import asyncio
+import time
+import typing
+from collections import deque
+
+BurstKey = typing.Tuple[int, str]
+EmitCallback = typing.Callable[[BurstKey, typing.List[str], float], None]
+
+
+class _Digest:
+    __slots__ = ('lines', 'started')
+
+    def __init__(self, started: float):
+        self.lines: typing.List[str] = []
+        self.started = started
+
+
+class BurstCoalescer:
+    """
+    Detects bursts of the same kind of log event in a guild. Once `threshold` events happen within
+    `window` seconds, further events are only collected as one-line summaries, and emitted as one digest
+    per window for as long as the burst lasts. When the rate drops below the threshold, events are
+    logged one by one again.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, emit: EmitCallback, *, window: float = 10.0, threshold: int = 5):
+        self.loop = loop
+        self.emit = emit
+        self.window = window
+        self.threshold = threshold
+        self._events: typing.Dict[BurstKey, typing.Deque[float]] = {}
+        self._digests: typing.Dict[BurstKey, _Digest] = {}
+        self._handles: typing.Dict[BurstKey, asyncio.TimerHandle] = {}
+
+    def _recent(self, key: BurstKey, now: float) -> typing.Deque[float]:
+        events = self._events.setdefault(key, deque())
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        return events
+
+    def submit(self, key: BurstKey, line: str) -> bool:
+        """ Records an event. Returns True if it was folded into a digest, False if it should be logged as usual. """
+        now = time.monotonic()
+        events = self._recent(key, now)
+        events.append(now)
+        digest = self._digests.get(key)
+        if digest is None:
+            if len(events) < self.threshold:
+                return False
+            digest = self._start(key, now)
+        digest.lines.append(line)
+        return True
+
+    def _start(self, key: BurstKey, now: float) -> _Digest:
+        digest = self._digests[key] = _Digest(now)
+        self._handles[key] = self.loop.call_later(self.window, self._flush, key)
+        return digest
+
+    def _flush(self, key: BurstKey) -> None:
+        self._handles.pop(key, None)
+        digest = self._digests.pop(key, None)
+        if digest is None:
+            return
+        now = time.monotonic()
+        if digest.lines:
+            self.emit(key, digest.lines, now - digest.started)
+        if len(self._recent(key, now)) >= self.threshold:
+            self._start(key, now)
+        elif not self._events[key]:
+            del self._events[key]
+
+    def close(self) -> None:
+        """ Emits what was collected so far and stops the timers. """
+        for handle in self._handles.values():
+            handle.cancel()
+        self._handles = {}
+        for key in list(self._digests):
+            digest = self._digests.pop(key)
+            if digest.lines:
+                self.emit(key, digest.lines, time.monotonic() - digest.started)
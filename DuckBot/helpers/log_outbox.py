@@ -0,0 +1,79 @@
+import asyncio
+import json
+import logging
+import typing
+
+import aiosqlite
+
+from DuckBot.helpers.periodic_flush import PeriodicFlusher
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY,
+                guild_id INTEGER NOT NULL,
+                deliver_type TEXT NOT NULL,
+                embed TEXT NOT NULL,
+                attachment TEXT,
+                queued_at REAL NOT NULL
+            )"""
+
+OutboxRow = typing.Tuple[int, int, str, dict, typing.Optional[str], float]
+
+
+class LogOutbox(PeriodicFlusher):
+    """
+    A local SQLite copy of the logs waiting to be delivered, so they survive restarts and crashes.
+    Logs are numbered in memory; inserts and deletes are buffered and written together every `interval` seconds.
+    """
+
+    def __init__(self, path: str, *, interval: float = 1.0):
+        super().__init__(interval=interval)
+        self.path = path
+        self._db: typing.Optional[aiosqlite.Connection] = None
+        self._next_id = 1
+        self._inserts: typing.List[tuple] = []
+        self._deletes: typing.List[typing.Tuple[int]] = []
+        self._lock = asyncio.Lock()
+
+    async def open(self) -> typing.List[OutboxRow]:
+        """ Opens the database and returns the logs left from the last run, oldest first. """
+        self._db = await aiosqlite.connect(self.path)
+        await self._db.execute(SCHEMA)
+        await self._db.commit()
+        async with self._db.execute('SELECT id, guild_id, deliver_type, embed, attachment, queued_at '
+                                    'FROM outbox ORDER BY id') as cursor:
+            rows = [(row[0], row[1], row[2], json.loads(row[3]), row[4], row[5]) for row in await cursor.fetchall()]
+        if rows:
+            self._next_id = rows[-1][0] + 1
+        self.start()
+        return rows
+
+    def add(self, guild_id: int, deliver_type: str, embed: dict, attachment: typing.Optional[str],
+            queued_at: float) -> int:
+        outbox_id = self._next_id
+        self._next_id += 1
+        self._inserts.append((outbox_id, guild_id, deliver_type, json.dumps(embed), attachment, queued_at))
+        return outbox_id
+
+    def remove(self, outbox_ids: typing.Iterable[int]) -> None:
+        self._deletes.extend((outbox_id,) for outbox_id in outbox_ids if outbox_id)
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._db or not (self._inserts or self._deletes):
+                return
+            inserts, self._inserts = self._inserts, []
+            deletes, self._deletes = self._deletes, []
+            try:
+                await self._db.executemany('INSERT OR REPLACE INTO outbox VALUES (?, ?, ?, ?, ?, ?)', inserts)
+                await self._db.executemany('DELETE FROM outbox WHERE id = ?', deletes)
+                await self._db.commit()
+            except Exception as e:
+                logging.error(f'Could not write {len(inserts)} logs to the outbox', exc_info=e)
+                self._inserts = inserts + self._inserts
+                self._deletes = deletes + self._deletes
+
+    async def close(self) -> None:
+        await super().close()
+        if self._db:
+            await self._db.close()
+            self._db = None
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+import typing
+from collections import deque
+
+import discord
+
+from DuckBot.helpers.embed_packing import fit_embed
+
+LogKey = typing.Tuple[int, str]
+
+
+class PendingLog:
+    """ A queued log embed, measured once when queued, and its full text if it had to be shortened. """
+    __slots__ = ('embed', 'size', 'attachment', 'queued_at', 'outbox_id')
+
+    def __init__(self, embed: discord.Embed, *, queued_at: float = None, attachment: typing.Optional[str] = None,
+                 outbox_id: int = None):
+        self.embed, self.size, self.attachment = fit_embed(embed)
+        self.attachment = self.attachment or attachment
+        self.queued_at = queued_at or time.time()
+        self.outbox_id = outbox_id
+
+
+LogBuckets = typing.DefaultDict[int, typing.DefaultDict[str, typing.Deque[PendingLog]]]
+DeliverCallback = typing.Callable[[int, str, typing.Deque[PendingLog]], typing.Awaitable[typing.Optional[float]]]
+
+
+class LogQueue:
+    """
+    Pending log embeds, bucketed per (guild_id, deliver_type) and drained by a small pool of workers.
+
+    A bucket is scheduled once, `delay` seconds after it stops being empty so bursts get batched,
+    and is only rescheduled while it still has embeds left. Nothing runs while no logs are pending.
+    The deliver callback returns how long to wait before the bucket can be delivered again, if at all,
+    and reports the logs it is done with through `done()`.
+
+    A guild keeps at most `max_per_guild` pending logs; the oldest ones are dropped past that.
+    If the bot has a log outbox, every pending log is also written to it until it is done.
+    """
+
+    def __init__(self, bot, deliver: DeliverCallback, *, workers: int = 8, delay: float = 1.0,
+                 max_per_guild: int = 1000):
+        self.bot = bot
+        self.deliver = deliver
+        self.workers = workers
+        self.delay = delay
+        self.max_per_guild = max_per_guild
+        self.buckets: LogBuckets = bot.log_cache
+        self.outbox = bot.log_outbox
+        self._scheduled: typing.Set[LogKey] = set()
+        self._ready: asyncio.Queue = asyncio.Queue()
+        self._tasks: typing.List[asyncio.Task] = []
+
+    @property
+    def pending(self) -> int:
+        return sum(len(bucket) for buckets in self.buckets.values() for bucket in buckets.values())
+
+    def put(self, guild_id: int, deliver_type: str, embed: discord.Embed, *, attachment: str = None) -> None:
+        log = PendingLog(embed, attachment=attachment)
+        guild_buckets = self.buckets[guild_id]
+        if sum(len(bucket) for bucket in guild_buckets.values()) >= self.max_per_guild:
+            fullest = guild_buckets[deliver_type] or max(guild_buckets.values(), key=len)
+            self.done([fullest.popleft()])
+        if self.outbox:
+            log.outbox_id = self.outbox.add(guild_id, deliver_type, log.embed.to_dict(), log.attachment, log.queued_at)
+        guild_buckets[deliver_type].append(log)
+        self._schedule((guild_id, deliver_type), self.delay)
+
+    def done(self, logs: typing.Iterable[PendingLog]) -> None:
+        """ Forgets logs that were delivered or given up on. """
+        if self.outbox:
+            self.outbox.remove(log.outbox_id for log in logs)
+
+    def drop_guild(self, guild_id: int) -> None:
+        """ Forgets every pending log of a guild, for when its logging is disabled or the bot leaves it. """
+        for bucket in self.buckets.pop(guild_id, {}).values():
+            self.done(bucket)
+            bucket.clear()
+
+    def _schedule(self, key: LogKey, delay: float) -> None:
+        if key in self._scheduled:
+            return
+        self._scheduled.add(key)
+        self.bot.loop.call_later(delay, self._ready.put_nowait, key)
+
+    def start(self) -> None:
+        self._tasks = [self.bot.loop.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(self.bot.loop.create_task(self._resume()))
+
+    async def _resume(self) -> None:
+        # Logs left over from before a reload, or restored from the outbox at boot, have no schedule yet.
+        # They wait for the log routes to be loaded, so they are not mistaken for logs of unrouted guilds.
+        await self.bot.wait_until_ready()
+        await self.bot.cache_ready.wait()
+        for guild_id in [guild_id for guild_id in self.buckets if guild_id not in self.bot.log_channels]:
+            # Logging was disabled, or the bot left the guild, while the bot was offline.
+            self.drop_guild(guild_id)
+        for guild_id, buckets in self.buckets.items():
+            for deliver_type, bucket in buckets.items():
+                if bucket:
+                    self._schedule((guild_id, deliver_type), self.delay)
+
+    async def _work(self) -> None:
+        await self.bot.wait_until_ready()
+        while True:
+            key = await self._ready.get()
+            bucket = self.buckets.get(key[0], {}).get(key[1], deque())
+            retry_after = None
+            try:
+                if bucket:
+                    retry_after = await self.deliver(*key, bucket)
+            except Exception as e:
+                logging.error(f'Could not deliver logs to {key}', exc_info=e)
+                retry_after = self.delay
+            finally:
+                # The key stays scheduled while its delivery runs, so a bucket is never drained twice at once.
+                self._scheduled.discard(key)
+            if bucket and self.buckets.get(key[0], {}).get(key[1]) is not bucket:
+                # The guild was dropped while its delivery ran, so whatever was put back goes too.
+                self.done(bucket)
+                bucket.clear()
+            if bucket:
+                self._schedule(key, retry_after or 0)
+
+    def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
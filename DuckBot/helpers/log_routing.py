@@ -0,0 +1,50 @@
+import typing
+
+DELIVER_TYPES = ('default', 'message', 'member', 'join_leave', 'voice', 'server')
+
+
+class LogRoute:
+    __slots__ = ('channel_id', 'webhook_url')
+
+    def __init__(self, channel_id: typing.Optional[int] = None, webhook_url: typing.Optional[str] = None):
+        self.channel_id = channel_id
+        self.webhook_url = webhook_url
+
+
+class GuildLogRoutes:
+    """
+    Where each type of log of a guild is delivered: the log channel, and the webhook URL used to post in it.
+    Routes are updated in place, so every holder of the object sees the change.
+    """
+    __slots__ = DELIVER_TYPES
+
+    def __init__(self, **routes: typing.Tuple[typing.Optional[int], typing.Optional[str]]):
+        for deliver_type in DELIVER_TYPES:
+            setattr(self, deliver_type, LogRoute(*routes.get(deliver_type, ())))
+
+    @classmethod
+    def from_record(cls, record: typing.Mapping[str, typing.Any]) -> 'GuildLogRoutes':
+        """ Builds the routes from a log_channels row, with its {type}_chid and {type}_channel columns. """
+        return cls(**{deliver_type: (record[f'{deliver_type}_chid'], record[f'{deliver_type}_channel'])
+                      for deliver_type in DELIVER_TYPES})
+
+    def route(self, deliver_type: str) -> LogRoute:
+        if deliver_type not in DELIVER_TYPES:
+            raise ValueError(f'Improper delivery type passed: {deliver_type!r}')
+        return getattr(self, deliver_type)
+
+    def webhook_url(self, deliver_type: str) -> typing.Optional[str]:
+        return self.route(deliver_type).webhook_url
+
+    def update(self, deliver_type: str, webhook_url: typing.Optional[str], channel_id: typing.Optional[int] = None) -> None:
+        route = self.route(deliver_type)
+        route.webhook_url = webhook_url
+        if channel_id is not None:
+            route.channel_id = channel_id
+
+    def as_tuple(self) -> tuple:
+        return tuple((route.channel_id, route.webhook_url) for route in map(self.route, DELIVER_TYPES))
+
+    @classmethod
+    def from_tuple(cls, routes: tuple) -> 'GuildLogRoutes':
+        return cls(**dict(zip(DELIVER_TYPES, routes)))
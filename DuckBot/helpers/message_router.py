@@ -0,0 +1,123 @@
+import typing
+from collections import Counter, defaultdict
+
+import discord
+
+IdContainer = typing.Callable[[], typing.Container[int]]
+MessageCallback = typing.Callable[[discord.Message], typing.Coroutine[typing.Any, typing.Any, typing.Any]]
+
+
+class MessageRoute:
+    """ A message handler and the cheap filters a message has to pass before the handler is scheduled. """
+    __slots__ = ('name', 'callback', 'in_guilds', 'in_dms', 'bots', 'guilds', 'channels', 'authors', 'predicate')
+
+    def __init__(self, name: str, callback: MessageCallback, *, in_guilds: bool = True, in_dms: bool = False,
+                 bots: bool = False, guilds: IdContainer = None, channels: IdContainer = None,
+                 authors: IdContainer = None, predicate: typing.Callable[[discord.Message], typing.Any] = None):
+        self.name = name
+        self.callback = callback
+        self.in_guilds = in_guilds
+        self.in_dms = in_dms
+        self.bots = bots
+        self.guilds = guilds
+        self.channels = channels
+        self.authors = authors
+        self.predicate = predicate
+
+    def matches(self, message: discord.Message) -> bool:
+        if self.guilds and (not message.guild or message.guild.id not in self.guilds()):
+            return False
+        if self.channels and message.channel.id not in self.channels():
+            return False
+        if self.authors and message.author.id not in self.authors():
+            return False
+        if self.predicate and not self.predicate(message):
+            return False
+        return True
+
+
+class RouteIndex:
+    """ The routes for one kind of message, by the channel or guild ids they are limited to. """
+    __slots__ = ('by_channel', 'by_guild', 'unfiltered')
+
+    def __init__(self, routes: typing.Iterable[MessageRoute]):
+        self.by_channel: typing.Dict[int, typing.List[MessageRoute]] = defaultdict(list)
+        self.by_guild: typing.Dict[int, typing.List[MessageRoute]] = defaultdict(list)
+        self.unfiltered: typing.List[MessageRoute] = []
+        for route in routes:
+            if route.channels:
+                for channel_id in route.channels():
+                    self.by_channel[channel_id].append(route)
+            elif route.guilds:
+                for guild_id in route.guilds():
+                    self.by_guild[guild_id].append(route)
+            else:
+                self.unfiltered.append(route)
+
+    def candidates(self, message: discord.Message) -> typing.Iterator[MessageRoute]:
+        yield from self.by_channel.get(message.channel.id, ())
+        if message.guild:
+            yield from self.by_guild.get(message.guild.id, ())
+        yield from self.unfiltered
+
+
+class MessageRouter:
+    """
+    Routes every message through one on_message dispatch.
+    Routes are indexed by (is DM, is bot author), then by the channel or guild ids they are limited to,
+    so a message is only checked against the routes that can act on it, and only the matching handlers get scheduled.
+
+    The channel and guild ids are read when the index is built; whoever changes them calls `invalidate()`.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.routes: typing.Dict[str, MessageRoute] = {}
+        self.hits = Counter()
+        self.messages = Counter()
+        self._index: typing.Dict[typing.Tuple[bool, bool], RouteIndex] = {}
+        self._stale = True
+
+    def add_route(self, callback: MessageCallback, *, name: str = None, **filters) -> MessageRoute:
+        route = MessageRoute(name or callback.__name__, callback, **filters)
+        self.routes[route.name] = route
+        self.invalidate()
+        return route
+
+    def remove_routes(self, cog) -> None:
+        """ Removes all the routes whose handlers belong to the given cog. """
+        for name, route in list(self.routes.items()):
+            if getattr(route.callback, '__self__', None) is cog:
+                del self.routes[name]
+        self.invalidate()
+
+    def invalidate(self) -> None:
+        """ Rebuilds the index on the next message, after routes or the ids they are limited to changed. """
+        self._stale = True
+
+    def _build_index(self) -> None:
+        index = {}
+        for is_dm in (True, False):
+            for is_bot in (True, False):
+                index[(is_dm, is_bot)] = RouteIndex(r for r in self.routes.values() if
+                                                    (r.in_dms if is_dm else r.in_guilds) and (r.bots or not is_bot))
+        self._index = index
+        self._stale = False
+
+    def dispatch(self, message: discord.Message) -> None:
+        if self._stale:
+            self._build_index()
+        key = (message.guild is None, message.author.bot)
+        self.messages[key] += 1
+        index = self._index.get(key)
+        if not index:
+            return
+        for route in index.candidates(message):
+            if route.matches(message):
+                self.hits[route.name] += 1
+                self.bot._schedule_event(route.callback, route.name, message)
+
+    def stats(self) -> typing.List[typing.Tuple[str, int, int]]:
+        """ Returns (name, hits, skips) for every route. Skips count all the messages the route did not run for. """
+        total = sum(self.messages.values())
+        return [(name, self.hits[name], total - self.hits[name]) for name in self.routes]
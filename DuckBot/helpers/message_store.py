@@ -0,0 +1,96 @@
+import typing
+import zlib
+from collections import OrderedDict
+
+import discord
+
+
+class StoredMessage:
+    __slots__ = ('id', 'guild_id', 'channel_id', 'author_id', 'author', 'avatar_url', '_content', 'attachments',
+                 'stickers')
+
+    def __init__(self, message: discord.Message, *, compress_over: typing.Optional[int] = None):
+        self.id = message.id
+        self.guild_id = message.guild.id
+        self.channel_id = message.channel.id
+        self.author_id = message.author.id
+        self.author = str(message.author)
+        self.avatar_url = message.author.display_avatar.url
+        self.attachments: typing.Tuple[typing.Tuple[str, str], ...] = tuple((a.filename, a.url) for a in message.attachments)
+        self.stickers: typing.Tuple[str, ...] = tuple(s.name for s in message.stickers)
+        self.set_content(message.content, compress_over=compress_over)
+
+    def set_content(self, content: str, *, compress_over: typing.Optional[int] = None) -> None:
+        """ Stores the content, zlib compressed if it is longer than `compress_over` characters. """
+        if compress_over is not None and len(content) > compress_over:
+            self._content = zlib.compress(content.encode())
+        else:
+            self._content = content
+
+    @property
+    def content(self) -> str:
+        if isinstance(self._content, bytes):
+            return zlib.decompress(self._content).decode()
+        return self._content
+
+    @property
+    def jump_url(self) -> str:
+        return f'https://discord.com/channels/{self.guild_id}/{self.channel_id}/{self.id}'
+
+
+class MessageStore:
+    """
+    A bounded store of the bits of messages the loggers need (author, content and attachments),
+    so deleted and edited messages can be logged long after they left discord.py's message cache.
+    The least recently seen message is evicted once `max_messages` is reached.
+    """
+
+    def __init__(self, max_messages: int, *, compress_over: typing.Optional[int] = None):
+        self.max_messages = max_messages
+        self.compress_over = compress_over
+        self._messages: typing.OrderedDict[int, StoredMessage] = OrderedDict()
+        self._guilds: typing.Dict[int, typing.Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def add(self, message: discord.Message) -> StoredMessage:
+        stored = self._messages[message.id] = StoredMessage(message, compress_over=self.compress_over)
+        self._messages.move_to_end(message.id)
+        self._guilds.setdefault(stored.guild_id, set()).add(message.id)
+        while len(self._messages) > self.max_messages:
+            self._forget(self._messages.popitem(last=False)[1])
+        return stored
+
+    def _forget(self, stored: StoredMessage) -> None:
+        message_ids = self._guilds.get(stored.guild_id)
+        if message_ids is not None:
+            message_ids.discard(stored.id)
+            if not message_ids:
+                del self._guilds[stored.guild_id]
+
+    def get(self, message_id: int) -> typing.Optional[StoredMessage]:
+        stored = self._messages.get(message_id)
+        if stored:
+            self._messages.move_to_end(message_id)
+        return stored
+
+    def edit(self, message_id: int, data: dict) -> None:
+        """ Applies the content and attachments of a raw MESSAGE_UPDATE payload. """
+        stored = self.get(message_id)
+        if not stored:
+            return
+        if 'content' in data:
+            stored.set_content(data['content'], compress_over=self.compress_over)
+        if 'attachments' in data:
+            stored.attachments = tuple((a['filename'], a['url']) for a in data['attachments'])
+
+    def pop(self, message_id: int) -> typing.Optional[StoredMessage]:
+        stored = self._messages.pop(message_id, None)
+        if stored:
+            self._forget(stored)
+        return stored
+
+    def remove_guild(self, guild_id: int) -> None:
+        for message_id in self._guilds.pop(guild_id, ()):
+            self._messages.pop(message_id, None)
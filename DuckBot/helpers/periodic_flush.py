@@ -0,0 +1,51 @@
+import asyncio
+import contextlib
+import logging
+import typing
+
+
+class PeriodicFlusher:
+    """
+    Runs `flush()` every `interval` seconds, or sooner when woken, until closed.
+
+    Closing stops the loop without cancelling it, so a flush that is writing when the bot
+    shuts down finishes, and then flushes once more for whatever was left.
+    Subclasses implement `flush()`, which should keep what it could not write for the next one.
+    """
+
+    def __init__(self, *, interval: float):
+        self.interval = interval
+        self._wakeup = asyncio.Event()
+        self._closing = False
+        self._task: typing.Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if not self._task or self._task.done():
+            self._closing = False
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    def wake(self) -> None:
+        """ Flushes now instead of at the end of the interval. """
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logging.error(f'{type(self).__name__} flush failed', exc_info=e)
+
+    async def flush(self) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """ Stops the loop, letting a running flush finish, and flushes whatever is still pending. """
+        self._closing = True
+        self._wakeup.set()
+        if self._task:
+            await self._task
+            self._task = None
+        await self.flush()
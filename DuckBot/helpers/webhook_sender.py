@@ -0,0 +1,143 @@
+import asyncio
+import json
+import time
+import typing
+
+import aiohttp
+import discord
+
+API_BASE = 'https://discord.com/api/v9'
+
+
+class RateLimitBucket:
+    __slots__ = ('remaining', 'reset_at')
+
+    def __init__(self):
+        self.remaining: typing.Optional[int] = None
+        self.reset_at = 0.0
+
+    def delay(self) -> float:
+        """ Seconds to wait before this bucket allows another request. """
+        if self.remaining is None or self.remaining > 0:
+            return 0.0
+        return max(0.0, self.reset_at - time.monotonic())
+
+
+class WebhookStats:
+    __slots__ = ('sent', 'average_latency', 'max_latency')
+
+    def __init__(self):
+        self.sent = 0
+        self.average_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency: float) -> None:
+        self.sent += 1
+        # Exponential moving average, so the number follows the current backlog rather than all time.
+        self.average_latency = latency if self.sent == 1 else self.average_latency * 0.9 + latency * 0.1
+        self.max_latency = max(self.max_latency, latency)
+
+
+class WebhookSender:
+    """
+    Executes webhooks directly, caching the parsed webhooks and tracking each one's rate limit
+    bucket from the response headers. Callers ask `delay()` before sending, and reschedule the
+    work instead of waiting, so one rate-limited webhook never holds up the others.
+
+    Like discord.py, buckets are keyed by the bucket hash *and* the webhook id, since the hash
+    leaves out major parameters. A global rate limit applies to every webhook, so it closes a
+    shared gate that all sends wait on, instead of being recorded on one bucket.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self._webhooks: typing.Dict[str, discord.Webhook] = {}
+        self._bucket_keys: typing.Dict[int, str] = {}
+        self._buckets: typing.Dict[typing.Tuple[str, int], RateLimitBucket] = {}
+        self._global_limit = asyncio.Event()
+        self._global_limit.set()
+        self.stats: typing.Dict[int, WebhookStats] = {}
+
+    def get_webhook(self, url: str) -> discord.Webhook:
+        webhook = self._webhooks.get(url)
+        if webhook is None:
+            webhook = self._webhooks[url] = discord.Webhook.from_url(url, session=self.bot.session,
+                                                                     bot_token=self.bot.http.token)
+        return webhook
+
+    def forget(self, url: str) -> None:
+        """ Drops a webhook that was deleted or replaced. """
+        webhook = self._webhooks.pop(url, None)
+        if webhook:
+            self._buckets.pop((self._bucket_keys.pop(webhook.id, ''), webhook.id), None)
+
+    def _bucket(self, webhook: discord.Webhook) -> RateLimitBucket:
+        key = (self._bucket_keys.get(webhook.id, ''), webhook.id)
+        return self._buckets.setdefault(key, RateLimitBucket())
+
+    async def _lift_global_limit(self, retry_after: float) -> None:
+        await asyncio.sleep(retry_after)
+        self._global_limit.set()
+
+    def delay(self, url: str) -> float:
+        return self._bucket(self.get_webhook(url)).delay()
+
+    async def send(self, url: str, *, embeds: typing.List[discord.Embed],
+                   files: typing.Sequence[typing.Tuple[str, str]] = (),
+                   enqueued_at: typing.Sequence[float] = ()) -> float:
+        """
+        Sends the embeds, and the (filename, text) files if any. Returns 0 once they are sent, or the seconds to wait if the webhook
+        was rate limited, in which case nothing was sent. Raises discord.NotFound if the webhook is gone.
+        """
+        webhook = self.get_webhook(url)
+        await self._global_limit.wait()
+        payload = {'embeds': [embed.to_dict() for embed in embeds]}
+        if files:
+            data = aiohttp.FormData()
+            data.add_field('payload_json', json.dumps(payload), content_type='application/json')
+            for index, (filename, text) in enumerate(files):
+                data.add_field(f'files[{index}]', text.encode(), filename=filename, content_type='text/plain')
+            request = {'data': data}
+        else:
+            request = {'json': payload}
+        async with self.bot.session.post(f'{API_BASE}/webhooks/{webhook.id}/{webhook.token}', **request) as response:
+            self._update_bucket(webhook, response)
+            if response.status == 429:
+                data = await response.json()
+                retry_after = float(data.get('retry_after', 1))
+                if data.get('global') or response.headers.get('X-RateLimit-Global'):
+                    if self._global_limit.is_set():
+                        self._global_limit.clear()
+                        self.bot.loop.create_task(self._lift_global_limit(retry_after))
+                    return retry_after
+                bucket = self._bucket(webhook)
+                bucket.remaining = 0
+                bucket.reset_at = max(bucket.reset_at, time.monotonic() + retry_after)
+                return retry_after
+            if response.status == 404:
+                self.forget(url)
+                raise discord.NotFound(response, await response.text())
+            if response.status >= 400:
+                raise discord.HTTPException(response, await response.text())
+
+        now = time.time()
+        stats = self.stats.setdefault(webhook.id, WebhookStats())
+        for timestamp in enqueued_at:
+            stats.record(now - timestamp)
+        return 0.0
+
+    def _update_bucket(self, webhook: discord.Webhook, response: aiohttp.ClientResponse) -> None:
+        key = response.headers.get('X-RateLimit-Bucket')
+        if key and self._bucket_keys.get(webhook.id) != key:
+            # The bucket is known now; carry over what was tracked under the placeholder key.
+            old = self._buckets.pop((self._bucket_keys.get(webhook.id, ''), webhook.id), None)
+            self._bucket_keys[webhook.id] = key
+            if old:
+                self._buckets.setdefault((key, webhook.id), old)
+        bucket = self._bucket(webhook)
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset_after = response.headers.get('X-RateLimit-Reset-After')
+        if remaining is not None:
+            bucket.remaining = int(remaining)
+        if reset_after is not None:
+            bucket.reset_at = time.monotonic() + float(reset_after)